@@ -71,6 +71,7 @@ from .monitoring.metrics import (
     update_active_connections,
     update_uptime_metrics,
 )
+from .scaling.auto_scaler import auto_scaler
 from .utils.rate_limiting import RateLimitMiddleware
 from .voice.context_manager import get_context_manager
 from .voice.multilang_support import get_multilang_processor
@@ -294,6 +295,7 @@ async def metrics_middleware(request: Request, call_next):
     path = request.url.path
     if not path.startswith("/static") and path != "/metrics":
         record_request_metrics(request.method, path, response.status_code, elapsed)
+        auto_scaler.record_request()
 
         import threading
         if not hasattr(request.app.state, "request_metrics"):
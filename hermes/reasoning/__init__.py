@@ -6,6 +6,8 @@ September 2025 best practices implementation
 from .tree_of_thought import TreeOfThoughtReasoner
 from .monte_carlo import MonteCarloValidator
 from .models import ReasoningPath, ReasoningResult, ValidationResult
+from .response_cache import ResponseCache
+from .semantic_cache import EmbeddingCache, SemanticSimulationCache, SQLiteEmbeddingStore
 
 __all__ = [
     "TreeOfThoughtReasoner",
@@ -13,4 +15,8 @@ __all__ = [
     "ReasoningPath",
     "ReasoningResult",
     "ValidationResult",
+    "SemanticSimulationCache",
+    "EmbeddingCache",
+    "SQLiteEmbeddingStore",
+    "ResponseCache",
 ]
@@ -5,16 +5,125 @@ Following September 2025 best practices
 
 import asyncio
 import logging
-import statistics
 import time
 from typing import List, Optional
 
+import numpy as np
 import openai
 
 from .models import ValidationResult
+from .response_cache import ResponseCache
+from .semantic_cache import EmbeddingCache, SemanticSimulationCache, SQLiteEmbeddingStore, context_digest
+from .token_budget import atruncate_to_tokens
 
 logger = logging.getLogger(__name__)
 
+# Cosine similarity at which two simulation answers count as the same answer
+SEMANTIC_MATCH_THRESHOLD = 0.82
+
+# Early stopping: the dominant answer cluster must hold this share of samples
+# with at least this mean cosine similarity to its centroid
+EARLY_STOP_MIN_SAMPLES = 10
+EARLY_STOP_DOMINANCE = 0.7
+EARLY_STOP_COHESION = 0.86
+
+# Number of simulation results kept on a ValidationResult for inspection
+VALIDATION_SAMPLE_SIZE = 10
+
+
+# Deletes ASCII characters that are neither alphanumeric nor whitespace
+_ASCII_PUNCTUATION_TABLE = str.maketrans({
+    c: None
+    for c in map(chr, range(128))
+    if not (c.isalnum() or c.isspace())
+})
+
+
+def _normalize_answer(text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace in an answer"""
+    if text.isascii():
+        # Fast path: one C-level pass instead of a per-character generator
+        normalized = text.lower().translate(_ASCII_PUNCTUATION_TABLE)
+    else:
+        normalized = ''.join(c.lower() for c in text if c.isalnum() or c.isspace())
+    return ' '.join(normalized.split())
+
+
+def _normalize(embedding: np.ndarray) -> np.ndarray:
+    """L2-normalize an embedding vector"""
+    norm = np.linalg.norm(embedding)
+    return embedding / norm if norm > 0 else embedding
+
+
+def _count_semantic_clusters(embeddings: np.ndarray, threshold: float) -> int:
+    """
+    Count connected components of the cosine-similarity graph.
+    
+    Args:
+        embeddings: L2-normalized embeddings, one row per answer
+        threshold: Minimum cosine similarity for two answers to be linked
+        
+    Returns:
+        Number of clusters of semantically equivalent answers
+    """
+    adjacency = (embeddings @ embeddings.T) >= threshold
+    unvisited = np.ones(len(embeddings), dtype=bool)
+    clusters = 0
+    
+    for start in range(len(embeddings)):
+        if not unvisited[start]:
+            continue
+        
+        clusters += 1
+        unvisited[start] = False
+        frontier = np.zeros(len(embeddings), dtype=bool)
+        frontier[start] = True
+        
+        # Breadth-first expansion over whole frontiers at once
+        while frontier.any():
+            frontier = adjacency[frontier].any(axis=0) & unvisited
+            unvisited &= ~frontier
+    
+    return clusters
+
+
+class _CentroidTracker:
+    """Running semantic centroids of simulation answers"""
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.total = 0
+        self._sums: Optional[np.ndarray] = None
+        self._counts: List[int] = []
+
+    def add(self, embeddings: np.ndarray) -> None:
+        """Assign L2-normalized embeddings to their nearest centroid"""
+        for vector in embeddings:
+            self.total += 1
+            if self._sums is not None:
+                centroids = self._sums / np.linalg.norm(self._sums, axis=1, keepdims=True)
+                similarities = centroids @ vector
+                nearest = int(similarities.argmax())
+                if similarities[nearest] >= self.threshold:
+                    self._sums[nearest] += vector
+                    self._counts[nearest] += 1
+                    continue
+            
+            row = vector[np.newaxis, :].astype(np.float32)
+            self._sums = row if self._sums is None else np.vstack([self._sums, row])
+            self._counts.append(1)
+
+    def has_converged(self, dominance: float, cohesion: float) -> bool:
+        """Check whether one tight cluster dominates the answers so far"""
+        if not self._counts:
+            return False
+        
+        largest = int(np.argmax(self._counts))
+        count = self._counts[largest]
+        # Norm of the mean unit vector = mean cosine similarity to the centroid
+        mean_cosine = float(np.linalg.norm(self._sums[largest])) / count
+        return count / self.total >= dominance and mean_cosine >= cohesion
+
 
 class MonteCarloValidator:
     """
@@ -30,11 +139,28 @@ class MonteCarloValidator:
         model: str = "gpt-4",
         default_simulations: int = 100,
         max_concurrent: int = 10,
+        embedding_model: Optional[str] = None,
+        response_cache_size: int = 0,
+        embedding_cache_path: Optional[str] = None,
+        max_context_tokens: int = 6000,
     ):
         self.client = openai.AsyncOpenAI(api_key=openai_api_key)
         self.model = model
         self.default_simulations = default_simulations
         self.max_concurrent = max_concurrent
+        self.max_context_tokens = max_context_tokens
+        # Opt-in: replaying cached samples makes repeated runs identical, which
+        # inflates consistency and hides variance
+        self.response_cache = ResponseCache(response_cache_size) if response_cache_size > 0 else None
+
+        # Semantic features are enabled by configuring an embedding model
+        self.embedding_model = embedding_model
+        self.semantic_cache = SemanticSimulationCache() if embedding_model else None
+        self.embedding_cache = None
+        if embedding_model:
+            # A cache path keeps embeddings warm across restarts
+            store = SQLiteEmbeddingStore(embedding_cache_path, embedding_model) if embedding_cache_path else None
+            self.embedding_cache = EmbeddingCache(store=store)
 
     async def simulate_reasoning(
         self,
@@ -45,6 +171,11 @@ class MonteCarloValidator:
         """
         Run Monte Carlo simulations for a query.
         
+        When a semantic cache is configured, results cached for an equivalent
+        query over the same context are reused and only the missing
+        simulations are run. With embeddings enabled, simulation also stops
+        early once one tight cluster of answers dominates the pool.
+        
         Args:
             query: The question or problem
             context: Optional context
@@ -55,60 +186,239 @@ class MonteCarloValidator:
         """
         num_simulations = num_simulations or self.default_simulations
         
-        # Create simulation tasks
+        # Apply the token budget once; every simulation and the cache
+        # embedding share the truncated context
+        if context:
+            context = await atruncate_to_tokens(context, self.max_context_tokens, self.model)
+        
+        # Reuse cached simulations for semantically equivalent queries
+        results: List[str] = []
+        query_embedding = None
+        context_key = context_digest(context)
+        if self.semantic_cache is not None:
+            query_embedding = await self._embed_query(query)
+            if query_embedding is not None:
+                results = self.semantic_cache.lookup(query_embedding, context_key) or []
+                if len(results) >= num_simulations:
+                    logger.info("Reused %d cached Monte Carlo simulations", num_simulations)
+                    return results[:num_simulations]
+        
+        cached_count = len(results)
+        
+        # Track answer centroids so simulation can stop once answers converge
+        tracker = _CentroidTracker(SEMANTIC_MATCH_THRESHOLD) if self.embedding_model else None
+        if tracker is not None and results:
+            if not await self._track_answers(tracker, results):
+                tracker = None
+            elif self._has_converged(tracker, results):
+                logger.info("Reused %d converged cached Monte Carlo simulations", cached_count)
+                return results
+        
+        # Launch all simulations; the semaphore starts a new one as soon as
+        # any slot frees instead of waiting for the slowest call in a batch
+        semaphore = asyncio.Semaphore(self.max_concurrent)
         tasks = [
-            self._run_single_simulation(query, context, i)
-            for i in range(num_simulations)
+            asyncio.create_task(self._run_single_simulation(query, context, i, semaphore))
+            for i in range(cached_count, num_simulations)
         ]
         
-        # Execute in batches to control concurrency
-        results = []
-        for i in range(0, len(tasks), self.max_concurrent):
-            batch = tasks[i:i + self.max_concurrent]
-            batch_results = await asyncio.gather(*batch, return_exceptions=True)
-            
-            for result in batch_results:
-                if isinstance(result, Exception):
-                    logger.warning(f"Simulation failed: {result}")
-                elif result:
-                    results.append(result)
+        untracked: List[str] = []
+        try:
+            for completed in asyncio.as_completed(tasks):
+                try:
+                    result = await completed
+                except Exception as e:
+                    logger.warning("Simulation failed: %s", e)
+                    continue
+                if not result:
+                    continue
+                
+                results.append(result)
+                untracked.append(result)
+                
+                # Check convergence every max_concurrent new answers
+                if tracker is None or len(untracked) < self.max_concurrent:
+                    continue
+                if not await self._track_answers(tracker, untracked):
+                    tracker = None
+                elif self._has_converged(tracker, results):
+                    logger.info(
+                        "Monte Carlo answers converged after %d simulations", len(results)
+                    )
+                    break
+                untracked = []
+        finally:
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        
+        if query_embedding is not None and len(results) > cached_count:
+            self.semantic_cache.store(query_embedding, results, context_key)
         
-        logger.info(f"Completed {len(results)}/{num_simulations} Monte Carlo simulations")
+        logger.info(
+            "Completed %d/%d Monte Carlo simulations (%d from cache)",
+            len(results), num_simulations, cached_count,
+        )
         return results
 
+    async def _track_answers(self, tracker: _CentroidTracker, answers: List[str]) -> bool:
+        """Add answers to the centroid tracker; False if embedding failed"""
+        embeddings = await self._embed_texts(answers)
+        if embeddings is None:
+            return False
+        tracker.add(embeddings)
+        return True
+
+    def _has_converged(self, tracker: _CentroidTracker, results: List[str]) -> bool:
+        """Check the early-stopping criteria for the current pool"""
+        return len(results) >= EARLY_STOP_MIN_SAMPLES and tracker.has_converged(
+            EARLY_STOP_DOMINANCE, EARLY_STOP_COHESION
+        )
+
+    async def _embed_query(self, query: str) -> Optional[np.ndarray]:
+        """Embed the query alone; the semantic cache matches contexts by digest"""
+        embeddings = await self._embed_texts([query])
+        return embeddings[0] if embeddings is not None else None
+
+    async def _embed_texts(self, texts: List[str]) -> Optional[np.ndarray]:
+        """
+        Embed texts with a single batched request.
+        
+        Embeddings already in the embedding cache are reused; only unseen
+        texts are sent to the API, each at most once. Texts are cached by
+        exact key: near-duplicates such as "X is liable" and "X is not
+        liable" must keep their own embeddings for clustering to see the
+        disagreement.
+        
+        Args:
+            texts: Texts to embed
+            
+        Returns:
+            L2-normalized embeddings (one row per text), or None on failure
+        """
+        vectors = await self.embedding_cache.aget_many(texts, fuzzy=False)
+        missing = list(dict.fromkeys(
+            text for text, vector in zip(texts, vectors) if vector is None
+        ))
+        
+        if missing:
+            try:
+                response = await self.client.embeddings.create(
+                    model=self.embedding_model,
+                    input=missing,
+                )
+            except Exception as e:
+                logger.warning("Embedding request failed: %s", e)
+                return None
+            
+            fresh = {}
+            for text, item in zip(missing, response.data):
+                fresh[text] = _normalize(np.asarray(item.embedding, dtype=np.float32))
+                self.embedding_cache.put(text, fresh[text], fuzzy=False)
+            await self.embedding_cache.aflush()
+            
+            vectors = [
+                vector if vector is not None else fresh[text]
+                for text, vector in zip(texts, vectors)
+            ]
+        
+        return np.vstack(vectors)
+
     async def _run_single_simulation(
         self,
         query: str,
         context: Optional[str],
         simulation_index: int,
+        semaphore: asyncio.Semaphore,
     ) -> Optional[str]:
         """Run a single Monte Carlo simulation"""
-        try:
-            prompt = f"""Answer the following question concisely:
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = ResponseCache.make_key(query, context, simulation_index, self.model)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        async with semaphore:
+            try:
+                prompt = f"""Answer the following question concisely:
 
 Query: {query}
 """
-            if context:
-                prompt += f"\nContext: {context}\n"
-            
-            prompt += "\nProvide a brief, direct answer."
-            
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a concise expert assistant. Provide brief, accurate answers."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.8,  # Higher temperature for diversity
-                max_tokens=200,
-            )
-            
-            content = response.choices[0].message.content
-            return content.strip() if content else None
-            
-        except Exception as e:
-            logger.error(f"Simulation {simulation_index} failed: {e}")
-            return None
+                if context:
+                    prompt += f"\nContext: {context}\n"
+                
+                prompt += "\nProvide a brief, direct answer."
+                
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": "You are a concise expert assistant. Provide brief, accurate answers."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.8,  # Higher temperature for diversity
+                    max_tokens=200,
+                )
+                
+                content = response.choices[0].message.content
+                if not content:
+                    return None
+                
+                answer = content.strip()
+                if cache_key is not None and answer:
+                    self.response_cache.put(cache_key, answer)
+                return answer
+                
+            except Exception as e:
+                logger.error("Simulation %d failed: %s", simulation_index, e)
+                return None
+
+    async def __aenter__(self):
+        """Async context manager entry"""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit"""
+        await self.close()
+
+    async def close(self) -> None:
+        """
+        Flush and close the persistent embedding store, if any.
+        
+        Owners of a validator configured with embedding_cache_path must
+        await this (or use the validator as an async context manager) on
+        shutdown; the validator has no shutdown hook of its own.
+        """
+        if self.embedding_cache is not None:
+            await self.embedding_cache.aclose()
+
+    def cache_stats(self) -> dict:
+        """
+        Get hit/miss statistics for the validator's caches.
+        
+        Returns:
+            Stats per enabled cache (response, semantic, embedding)
+        """
+        stats = {}
+        if self.response_cache is not None:
+            stats["response"] = self.response_cache.stats()
+        if self.semantic_cache is not None:
+            stats["semantic"] = {
+                "hits": self.semantic_cache.hits,
+                "misses": self.semantic_cache.misses,
+                "size": len(self.semantic_cache),
+                "max_entries": self.semantic_cache.max_entries,
+            }
+        if self.embedding_cache is not None:
+            stats["embedding"] = {
+                "hits": self.embedding_cache.hits,
+                "misses": self.embedding_cache.misses,
+                "size": len(self.embedding_cache),
+                "max_entries": self.embedding_cache.max_entries,
+            }
+        return stats
 
     def calculate_consistency(self, results: List[str]) -> float:
         """
@@ -129,12 +439,7 @@ Query: {query}
         # In production, use embeddings for semantic similarity
         
         # Count unique responses (normalized)
-        unique_normalized = set()
-        for result in results:
-            # Normalize by converting to lowercase and removing punctuation
-            normalized = ''.join(c.lower() for c in result if c.isalnum() or c.isspace())
-            normalized = ' '.join(normalized.split())  # Normalize whitespace
-            unique_normalized.add(normalized)
+        unique_normalized = {_normalize_answer(result) for result in results}
         
         # Consistency = 1 - (unique_responses / total_responses)
         # If all responses are identical, consistency = 1.0
@@ -148,6 +453,37 @@ Query: {query}
         
         return consistency
 
+    async def calculate_semantic_consistency(self, results: List[str]) -> float:
+        """
+        Calculate consistency score from embedding similarity of results.
+        
+        Answers whose embeddings have cosine similarity above
+        SEMANTIC_MATCH_THRESHOLD are linked, and consistency is derived from
+        the number of connected clusters. Falls back to the lexical
+        calculate_consistency when embeddings are unavailable.
+        
+        Args:
+            results: List of simulation results
+            
+        Returns:
+            Consistency score (0.0 to 1.0)
+        """
+        if not results or len(results) < 2:
+            return 0.0
+        
+        embeddings = await self._embed_texts(results) if self.embedding_model else None
+        if embeddings is None:
+            return self.calculate_consistency(results)
+        
+        clusters = _count_semantic_clusters(embeddings, SEMANTIC_MATCH_THRESHOLD)
+        consistency = max(0.0, 1.0 - clusters / len(results))
+        
+        # Adjust for small sample sizes
+        if len(results) < 10:
+            consistency *= (len(results) / 10)
+        
+        return consistency
+
     def calculate_confidence(
         self,
         consistency_score: float,
@@ -186,23 +522,15 @@ Query: {query}
             return 0.0
         
         # Calculate length variance as a simple metric
-        lengths = [len(result) for result in results]
-        
-        if len(lengths) < 2:
-            return 0.0
+        lengths = np.fromiter((len(result) for result in results), dtype=np.int64, count=len(results))
+        mean_length = lengths.mean()
         
-        try:
-            mean_length = statistics.mean(lengths)
-            std_dev = statistics.stdev(lengths)
-            
-            # Coefficient of variation (normalized variance)
-            if mean_length > 0:
-                cv = std_dev / mean_length
-                # Cap at 1.0
-                return min(1.0, cv)
-            else:
-                return 0.0
-        except Exception:
+        # Coefficient of variation (normalized variance)
+        if mean_length > 0:
+            cv = float(lengths.std(ddof=1) / mean_length)
+            # Cap at 1.0
+            return min(1.0, cv)
+        else:
             return 0.0
 
     async def validate(
@@ -224,10 +552,9 @@ Query: {query}
         Returns:
             Validation result with consistency and confidence scores
         """
-        start_time = time.time()
-        num_simulations = num_simulations or self.default_simulations
+        start_time = time.perf_counter()
         
-        # Run simulations
+        # Run simulations (simulate_reasoning resolves the default count)
         results = await self.simulate_reasoning(query, context, num_simulations)
         
         if not results:
@@ -243,16 +570,16 @@ Query: {query}
             )
         
         # Calculate metrics
-        consistency = self.calculate_consistency(results)
+        consistency = await self.calculate_semantic_consistency(results)
         confidence = self.calculate_confidence(consistency, len(results))
         variance = self.calculate_variance(results)
         validated = consistency >= min_consistency
         
-        execution_time = (time.time() - start_time) * 1000
+        execution_time = (time.perf_counter() - start_time) * 1000
         
         logger.info(
-            f"Monte Carlo validation: consistency={consistency:.3f}, "
-            f"confidence={confidence:.3f}, validated={validated}"
+            "Monte Carlo validation: consistency=%.3f, confidence=%.3f, validated=%s",
+            consistency, confidence, validated,
         )
         
         return ValidationResult(
@@ -263,5 +590,9 @@ Query: {query}
             validated=validated,
             reasoning_variance=variance,
             execution_time_ms=execution_time,
-            simulation_results=results[:10],  # Store first 10 for inspection
+            # Store first few for inspection; small pools are passed as-is
+            simulation_results=(
+                results if len(results) <= VALIDATION_SAMPLE_SIZE
+                else results[:VALIDATION_SAMPLE_SIZE]
+            ),
         )
@@ -0,0 +1,70 @@
+"""
+Exact-match cache of LLM responses for repeated reasoning queries
+Lets FAQ-style (query, context) pairs skip the API round trip within a process
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class ResponseCache:
+    """
+    LRU cache of raw completion text keyed by a digest of the request.
+
+    Keys hash (query, context, index) with blake2b so long prompts are not
+    kept alive as dict keys; the model name is part of the key so reasoners
+    sharing a cache never mix outputs across models.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        """
+        Initialize response cache.
+
+        Args:
+            max_entries: Maximum number of cached responses (LRU eviction)
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple[bytes, str], str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(query: str, context: Optional[str], index: int, model: str) -> tuple[bytes, str]:
+        """Build the cache key for one simulation or reasoning path"""
+        payload = f"{query}\x00{context or ''}\x00{index}".encode("utf-8")
+        return hashlib.blake2b(payload, digest_size=16).digest(), model
+
+    def get(self, key: tuple[bytes, str]) -> Optional[str]:
+        """Return the cached response for key, if any"""
+        response = self._entries.get(key)
+        if response is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return response
+
+    def put(self, key: tuple[bytes, str], response: str) -> None:
+        """Cache a response"""
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached responses"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+        }
@@ -0,0 +1,540 @@
+"""
+Semantic caches for Monte Carlo simulation results
+Reuses simulation pools and embeddings across equivalent queries and answers
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+")
+# Words per SimHash shingle; overlapping word trigrams keep word order, so
+# "plaintiff owes defendant" and "defendant owes plaintiff" differ
+SHINGLE_SIZE = 3
+_BIT_POSITIONS = np.arange(64, dtype=np.uint64)
+
+
+@dataclass
+class _CacheEntry:
+    """Simulation pool stored against a query embedding slot"""
+
+    results: List[str]
+    stored_at: float
+
+
+def context_digest(context: Optional[str]) -> int:
+    """64-bit digest identifying a context exactly (0 for no context)"""
+    if not context:
+        return 0
+    return int.from_bytes(hashlib.blake2b(context.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class SemanticSimulationCache:
+    """
+    In-memory semantic cache of Monte Carlo simulation pools.
+
+    Entries are keyed by a digest of the context plus the L2-normalized
+    embedding of the query alone. Contexts must match exactly and queries
+    are matched by cosine similarity, so paraphrased questions over the same
+    context reuse the pool of an earlier run instead of paying for a fresh
+    round of LLM calls. A long shared context never enters the embedding, so
+    it cannot make distinct questions look alike. Embeddings live in a
+    preallocated matrix so a lookup is a single matrix-vector product over
+    all slots.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.92,
+        merge_threshold: float = 0.95,
+        ttl_seconds: float = 300.0,
+        max_entries: int = 256,
+    ):
+        """
+        Initialize semantic cache.
+
+        Args:
+            similarity_threshold: Minimum cosine similarity for a cache hit
+            merge_threshold: Cosine similarity above which a stored entry is
+                updated in place instead of adding a new one
+            ttl_seconds: Seconds before an entry expires
+            max_entries: Maximum number of cached pools (LRU eviction)
+        """
+        self.similarity_threshold = similarity_threshold
+        self.merge_threshold = merge_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._vectors: Optional[np.ndarray] = None
+        self._live = np.zeros(max_entries, dtype=bool)
+        self._context_keys = np.zeros(max_entries, dtype=np.uint64)
+        self._entries: "OrderedDict[int, _CacheEntry]" = OrderedDict()
+        self._free_slots: List[int] = list(range(max_entries - 1, -1, -1))
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, embedding: np.ndarray, context_key: int = 0) -> Optional[List[str]]:
+        """
+        Find the cached simulation pool for a query embedding.
+
+        Args:
+            embedding: L2-normalized query embedding
+            context_key: context_digest() of the query's context
+
+        Returns:
+            Copy of the cached results, or None on a miss
+        """
+        slot, similarity = self._nearest(embedding, context_key)
+        if slot is None or similarity < self.similarity_threshold:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(slot)
+        self.hits += 1
+        logger.debug("Semantic cache hit (cosine=%.3f)", similarity)
+        return list(self._entries[slot].results)
+
+    def store(self, embedding: np.ndarray, results: List[str], context_key: int = 0) -> None:
+        """
+        Store a simulation pool for a query embedding.
+
+        Args:
+            embedding: L2-normalized query embedding
+            results: Simulation results to cache
+            context_key: context_digest() of the query's context
+        """
+        slot, similarity = self._nearest(embedding, context_key)
+        if slot is None or similarity < self.merge_threshold:
+            slot = self._allocate_slot(embedding.shape[-1])
+
+        self._vectors[slot] = embedding
+        self._context_keys[slot] = context_key
+        self._live[slot] = True
+        self._entries[slot] = _CacheEntry(results=list(results), stored_at=time.monotonic())
+        self._entries.move_to_end(slot)
+
+    def clear(self) -> None:
+        """Drop all cached entries"""
+        self._entries.clear()
+        self._live[:] = False
+        self._free_slots = list(range(self.max_entries - 1, -1, -1))
+
+    def _nearest(self, embedding: np.ndarray, context_key: int) -> tuple[Optional[int], float]:
+        """Return the most similar live slot for the same context and its cosine similarity"""
+        if not self._entries:
+            return None, -1.0
+
+        self._expire()
+        if not self._entries:
+            return None, -1.0
+
+        similarities = self._vectors @ embedding
+        similarities[~self._live | (self._context_keys != np.uint64(context_key))] = -np.inf
+        slot = int(similarities.argmax())
+        if similarities[slot] == -np.inf:
+            return None, -1.0
+        return slot, float(similarities[slot])
+
+    def _expire(self) -> None:
+        """Free entries older than the TTL"""
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [slot for slot, entry in self._entries.items() if entry.stored_at < cutoff]
+        for slot in expired:
+            self._release_slot(slot)
+
+    def _allocate_slot(self, dimension: int) -> int:
+        """Get a free slot, evicting the least recently used entry if full"""
+        if self._vectors is None or self._vectors.shape[1] != dimension:
+            self._vectors = np.zeros((self.max_entries, dimension), dtype=np.float32)
+            self.clear()
+
+        if not self._free_slots:
+            lru_slot = next(iter(self._entries))
+            self._release_slot(lru_slot)
+
+        return self._free_slots.pop()
+
+    def _release_slot(self, slot: int) -> None:
+        del self._entries[slot]
+        self._live[slot] = False
+        self._free_slots.append(slot)
+
+
+def simhash64(text: str) -> int:
+    """
+    64-bit SimHash fingerprint of a text's normalized word shingles.
+
+    Features are overlapping SHINGLE_SIZE-word windows, so texts that differ
+    only in case, punctuation or a few words produce fingerprints a small
+    Hamming distance apart, while reordering words changes the fingerprint.
+
+    Args:
+        text: Text to fingerprint
+
+    Returns:
+        Fingerprint as an unsigned 64-bit integer
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return 0
+
+    if len(tokens) <= SHINGLE_SIZE:
+        shingles = [" ".join(tokens)]
+    else:
+        shingles = [
+            " ".join(tokens[i:i + SHINGLE_SIZE])
+            for i in range(len(tokens) - SHINGLE_SIZE + 1)
+        ]
+
+    hashes = np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+            for shingle in shingles
+        ),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    bits = (hashes[:, np.newaxis] >> _BIT_POSITIONS) & np.uint64(1)
+    votes = (2 * bits.astype(np.int64) - 1).sum(axis=0)
+
+    fingerprint = 0
+    for position in np.flatnonzero(votes > 0):
+        fingerprint |= 1 << int(position)
+    return fingerprint
+
+
+def exact_key(text: str) -> bytes:
+    """128-bit digest identifying a text exactly"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class _BKTree:
+    """BK-tree over 64-bit fingerprints under Hamming distance"""
+
+    def __init__(self):
+        self._root: Optional[tuple[int, Dict[int, tuple]]] = None
+
+    def add(self, key: int) -> None:
+        if self._root is None:
+            self._root = (key, {})
+            return
+
+        node_key, children = self._root
+        while True:
+            distance = (key ^ node_key).bit_count()
+            if distance == 0:
+                return
+            child = children.get(distance)
+            if child is None:
+                children[distance] = (key, {})
+                return
+            node_key, children = child
+
+    def nearest(self, key: int, max_distance: int, accept: Callable[[int], bool]) -> Optional[int]:
+        """Closest accepted key within max_distance, if any"""
+        best_key, best_distance = None, max_distance + 1
+        stack = [self._root] if self._root is not None else []
+
+        while stack:
+            node_key, children = stack.pop()
+            distance = (key ^ node_key).bit_count()
+            if distance < best_distance and accept(node_key):
+                best_key, best_distance = node_key, distance
+
+            # Triangle inequality: only subtrees that can hold a closer key
+            for edge, child in children.items():
+                if abs(edge - distance) < best_distance:
+                    stack.append(child)
+
+        return best_key
+
+
+class SQLiteEmbeddingStore:
+    """
+    On-disk embedding store so cached embeddings survive restarts.
+
+    Rows are keyed by (model, h), where h is an 8-byte SimHash fingerprint
+    or a 16-byte exact digest, with the float32 vector in a BLOB column.
+    Writes are buffered and committed in one transaction per flush(); the
+    database runs in WAL mode so readers never block the writer.
+
+    get(), get_many(), flush() and close() do blocking I/O and are safe to
+    run in worker threads; put() only touches the in-memory buffer.
+    """
+
+    # 2: shingled fingerprints plus exact digests; version 1 rows were keyed
+    # by bag-of-words fingerprints and are ignored
+    SCHEMA_VERSION = 2
+    # Keys per IN (...) query, below SQLite's default host-parameter limit
+    MAX_KEYS_PER_QUERY = 500
+
+    def __init__(self, path: str, model: str):
+        """
+        Open (or create) an embedding store.
+
+        Args:
+            path: SQLite database file
+            model: Embedding model the stored vectors belong to
+        """
+        self.path = path
+        self.model = model
+        self._pending: Dict[bytes, bytes] = {}
+        # Rows taken by an in-progress flush, still visible to get()
+        self._writing: Dict[bytes, bytes] = {}
+        # Guards the buffers; held only for dict operations
+        self._buffer_lock = threading.Lock()
+        # Serializes statements and transactions on the shared connection
+        self._db_lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS emb ("
+            "model TEXT NOT NULL, h BLOB NOT NULL, vec BLOB NOT NULL, "
+            "ts INTEGER NOT NULL, schema_version INTEGER NOT NULL, "
+            "PRIMARY KEY (model, h))"
+        )
+
+    def get(self, h: bytes) -> Optional[np.ndarray]:
+        """Return the stored embedding for a key, if any (read errors are misses)"""
+        return self.get_many([h]).get(h)
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """
+        Return stored embeddings for the keys found, reading the rest in one query.
+
+        Read errors are logged and the unread keys treated as misses.
+        """
+        blobs: Dict[bytes, bytes] = {}
+        with self._buffer_lock:
+            for h in keys:
+                blob = self._pending.get(h) or self._writing.get(h)
+                if blob is not None:
+                    blobs[h] = blob
+
+        unread = list(dict.fromkeys(h for h in keys if h not in blobs))
+        try:
+            with self._db_lock:
+                for start in range(0, len(unread), self.MAX_KEYS_PER_QUERY):
+                    chunk = unread[start:start + self.MAX_KEYS_PER_QUERY]
+                    rows = self._conn.execute(
+                        "SELECT h, vec FROM emb WHERE model = ? AND schema_version = ? "
+                        f"AND h IN ({', '.join('?' * len(chunk))})",
+                        (self.model, self.SCHEMA_VERSION, *chunk),
+                    ).fetchall()
+                    blobs.update(rows)
+        except sqlite3.Error as e:
+            logger.warning("Failed to read cached embeddings: %s", e)
+
+        return {h: np.frombuffer(blob, dtype=np.float32) for h, blob in blobs.items()}
+
+    def put(self, h: bytes, embedding: np.ndarray) -> None:
+        """Queue an embedding to be written on the next flush()"""
+        blob = np.asarray(embedding, dtype=np.float32).tobytes()
+        with self._buffer_lock:
+            self._pending[h] = blob
+
+    def flush(self) -> None:
+        """Write queued embeddings in a single transaction"""
+        with self._db_lock:
+            with self._buffer_lock:
+                if not self._pending:
+                    return
+                self._writing, self._pending = self._pending, {}
+
+            now = int(time.time())
+            rows = [
+                (self.model, h, blob, now, self.SCHEMA_VERSION)
+                for h, blob in self._writing.items()
+            ]
+            try:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO emb (model, h, vec, ts, schema_version) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                logger.warning("Failed to persist %d embeddings: %s", len(rows), e)
+                with self._buffer_lock:
+                    # Keep the rows for the next flush; newer puts win
+                    self._writing.update(self._pending)
+                    self._pending, self._writing = self._writing, {}
+                return
+
+            with self._buffer_lock:
+                self._writing = {}
+
+    def close(self) -> None:
+        """Flush pending writes and close the database"""
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+
+class EmbeddingCache:
+    """
+    LRU memo of text embeddings.
+
+    Simulation outputs repeat heavily across runs, so memoizing embeddings
+    per text avoids re-embedding answers that have already been seen.
+    Fuzzy entries are keyed by SimHash fingerprint, so trivial rewrites
+    ("Answer: yes." vs "answer: yes") hit the cache too, and an opt-in
+    max_distance also reuses fingerprints a few bits away. Exact entries are
+    keyed by a digest of the full text and never match another text; use
+    them wherever near-duplicates must not share an embedding, such as
+    answers whose meaning a single "not" flips. An optional
+    SQLiteEmbeddingStore backs the in-memory LRU so embeddings persist
+    across restarts.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        max_distance: int = 0,
+        store: Optional[SQLiteEmbeddingStore] = None,
+    ):
+        """
+        Initialize embedding cache.
+
+        Args:
+            max_entries: Maximum number of cached embeddings (LRU eviction)
+            max_distance: Maximum Hamming distance between fingerprints for a
+                near-duplicate hit. Defaults to 0 (equal fingerprints only):
+                a few bits can separate an answer from its negation
+            store: Optional persistent store consulted on in-memory misses
+        """
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.store = store
+        # int keys are SimHash fingerprints, bytes keys exact digests
+        self._entries: "OrderedDict[Union[int, bytes], np.ndarray]" = OrderedDict()
+        self._index = _BKTree()
+        self._indexed = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, text: str, fuzzy: bool = True) -> Optional[np.ndarray]:
+        """
+        Return the cached embedding for text, if any.
+
+        Args:
+            text: Text to look up
+            fuzzy: Also accept a near-duplicate's embedding; False requires
+                an exact match of the text
+        """
+        key, embedding = self._lookup(text, fuzzy)
+        if embedding is not None:
+            return embedding
+        if self.store is not None:
+            embedding = self.store.get(self._store_key(key))
+        return self._settle(key, embedding)
+
+    async def aget_many(self, texts: List[str], fuzzy: bool = True) -> List[Optional[np.ndarray]]:
+        """
+        get() for several texts, reading in-memory misses from the persistent
+        store with one query in a worker thread.
+
+        Returns:
+            Cached embedding or None for each text, in order
+        """
+        lookups = [self._lookup(text, fuzzy) for text in texts]
+        wanted = [self._store_key(key) for key, embedding in lookups if embedding is None]
+        stored: Dict[bytes, np.ndarray] = {}
+        if self.store is not None and wanted:
+            stored = await asyncio.to_thread(self.store.get_many, wanted)
+        return [
+            embedding if embedding is not None else self._settle(key, stored.get(self._store_key(key)))
+            for key, embedding in lookups
+        ]
+
+    def _lookup(self, text: str, fuzzy: bool) -> Tuple[Union[int, bytes], Optional[np.ndarray]]:
+        """Return text's own key and its in-memory embedding, if any"""
+        own_key = simhash64(text) if fuzzy else exact_key(text)
+        key = own_key
+        if fuzzy and key not in self._entries and self.max_distance > 0:
+            key = self._index.nearest(key, self.max_distance, self._entries.__contains__)
+
+        if key is None or key not in self._entries:
+            return own_key, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return own_key, self._entries[key]
+
+    def _settle(self, key: Union[int, bytes], embedding: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Count an in-memory miss and remember embeddings found in the store"""
+        if embedding is None:
+            self.misses += 1
+            return None
+        self._remember(key, embedding)
+        self.hits += 1
+        return embedding
+
+    def put(self, text: str, embedding: np.ndarray, fuzzy: bool = True) -> None:
+        """Cache the embedding for text under a fuzzy or exact key"""
+        key = simhash64(text) if fuzzy else exact_key(text)
+        self._remember(key, embedding)
+        if self.store is not None:
+            self.store.put(self._store_key(key), embedding)
+
+    def flush(self) -> None:
+        """Persist embeddings added since the last flush"""
+        if self.store is not None:
+            self.store.flush()
+
+    async def aflush(self) -> None:
+        """flush() in a worker thread"""
+        if self.store is not None:
+            await asyncio.to_thread(self.store.flush)
+
+    async def aclose(self) -> None:
+        """Flush and close the persistent store in a worker thread"""
+        if self.store is not None:
+            await asyncio.to_thread(self.store.close)
+
+    @staticmethod
+    def _store_key(key: Union[int, bytes]) -> bytes:
+        return key.to_bytes(8, "big") if isinstance(key, int) else key
+
+    def _remember(self, key: Union[int, bytes], embedding: np.ndarray) -> None:
+        """Add an embedding to the in-memory LRU"""
+        if key not in self._entries and isinstance(key, int):
+            # Only fingerprints take part in near-duplicate search
+            self._index.add(key)
+            self._indexed += 1
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            # Evicted keys stay in the BK-tree until it is rebuilt
+            if self._indexed > 2 * self.max_entries:
+                self._rebuild_index()
+
+    def _rebuild_index(self) -> None:
+        self._index = _BKTree()
+        self._indexed = 0
+        for key in self._entries:
+            if isinstance(key, int):
+                self._index.add(key)
+                self._indexed += 1
@@ -0,0 +1,85 @@
+"""
+Token budgeting for reasoning prompts
+Truncates oversized context before it is sent to the model
+"""
+
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Any, Optional
+
+# Fall back to a character estimate when tiktoken is missing
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio for English text, used without tiktoken
+APPROX_CHARS_PER_TOKEN = 4
+# Oversized text is cut to this many characters per budgeted token before
+# encoding, so tokenizing cost is bounded by the budget, not the input
+MAX_CHARS_PER_TOKEN = 8
+
+
+@lru_cache(maxsize=None)
+def _encoding_for_model(model: str) -> Optional[Any]:
+    """Load the tokenizer for a model once per process"""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning("Failed to load tokenizer for %s: %s", model, e)
+        return None
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """
+    Truncate text to at most max_tokens tokens for a model.
+
+    Loading a tokenizer may download its BPE file and encoding is CPU-bound,
+    so async callers should use atruncate_to_tokens().
+
+    Args:
+        text: Text to truncate
+        max_tokens: Token budget
+        model: Model whose tokenizer defines the budget
+
+    Returns:
+        The text unchanged if it fits, otherwise its longest fitting prefix
+    """
+    # Every token covers at least one character, so short text always fits
+    if len(text) <= max_tokens:
+        return text
+
+    encoding = _encoding_for_model(model)
+    if encoding is None:
+        max_chars = max_tokens * APPROX_CHARS_PER_TOKEN
+        if len(text) <= max_chars:
+            return text
+        logger.warning("Truncating context from %d to %d characters", len(text), max_chars)
+        return text[:max_chars]
+
+    head = text[:max_tokens * MAX_CHARS_PER_TOKEN]
+    tokens = encoding.encode(head)
+    if len(tokens) <= max_tokens:
+        if len(head) < len(text):
+            logger.warning("Truncating context from %d to %d characters", len(text), len(head))
+        return head
+
+    logger.warning("Truncating context to %d tokens", max_tokens)
+    return encoding.decode(tokens[:max_tokens])
+
+
+async def atruncate_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """truncate_to_tokens() with tokenizer loading and encoding in a worker thread"""
+    if len(text) <= max_tokens:
+        return text
+    return await asyncio.to_thread(truncate_to_tokens, text, max_tokens, model)
@@ -4,17 +4,30 @@ Following September 2025 best practices for async AI reasoning
 """
 
 import asyncio
+import itertools
+import json
 import logging
+import re
+import secrets
 import time
 from typing import List, Optional
-from uuid import uuid4
 
+import numpy as np
 import openai
 
 from .models import ReasoningPath, ReasoningResult
+from .response_cache import ResponseCache
+from .token_budget import atruncate_to_tokens
 
 logger = logging.getLogger(__name__)
 
+_CONCLUSION_RE = re.compile(r'(?:conclusion|therefore|in summary)\s*:', re.IGNORECASE)
+_STEP_RE = re.compile(r'\d|[-•]')
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+_SCORE_RE = re.compile(r'\d+(?:\.\d+)?')
+# A score followed by any other character can no longer grow more digits
+_COMPLETE_SCORE_RE = re.compile(r'\d+(?:\.\d+)?(?=[^\d.])')
+
 
 class TreeOfThoughtReasoner:
     """
@@ -30,11 +43,23 @@ class TreeOfThoughtReasoner:
         model: str = "gpt-4",
         num_paths: int = 3,
         max_concurrent: int = 3,
+        evaluation_batch_size: int = 10,
+        response_cache_size: int = 512,
+        evaluation_flush_interval: float = 0.25,
+        max_context_tokens: int = 6000,
     ):
         self.client = openai.AsyncOpenAI(api_key=openai_api_key)
         self.model = model
         self.num_paths = num_paths
         self.max_concurrent = max_concurrent
+        self.evaluation_batch_size = evaluation_batch_size
+        self.evaluation_flush_interval = evaluation_flush_interval
+        self.max_context_tokens = max_context_tokens
+        self.response_cache = ResponseCache(response_cache_size) if response_cache_size > 0 else None
+        
+        # Path ids: random per-reasoner prefix plus a counter
+        self._id_prefix = secrets.token_hex(6)
+        self._id_counter = itertools.count()
 
     async def generate_reasoning_paths(
         self,
@@ -54,26 +79,19 @@ class TreeOfThoughtReasoner:
             List of reasoning paths
         """
         num_paths = num_paths or self.num_paths
+        context = await self._fit_context(context)
         
-        # Create tasks for concurrent path generation
-        tasks = [
-            self._generate_single_path(query, context, i)
+        # Run all paths concurrently; the semaphore starts the next path as
+        # soon as any slot frees instead of waiting on a whole batch
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        # _generate_single_path logs its own failures and returns None
+        results = await asyncio.gather(*[
+            self._generate_single_path(query, context, i, semaphore)
             for i in range(num_paths)
-        ]
+        ])
+        paths = [path for path in results if path is not None]
         
-        # Execute concurrently with limit
-        paths = []
-        for i in range(0, len(tasks), self.max_concurrent):
-            batch = tasks[i:i + self.max_concurrent]
-            batch_results = await asyncio.gather(*batch, return_exceptions=True)
-            
-            for result in batch_results:
-                if isinstance(result, Exception):
-                    logger.error(f"Path generation failed: {result}")
-                elif result:
-                    paths.append(result)
-        
-        logger.info(f"Generated {len(paths)} reasoning paths for query")
+        logger.info("Generated %d reasoning paths for query", len(paths))
         return paths
 
     async def _generate_single_path(
@@ -81,41 +99,77 @@ class TreeOfThoughtReasoner:
         query: str,
         context: Optional[str],
         path_index: int,
+        semaphore: asyncio.Semaphore,
     ) -> Optional[ReasoningPath]:
         """Generate a single reasoning path"""
-        try:
-            prompt = self._build_reasoning_prompt(query, context, path_index)
-            
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert legal reasoning assistant. Think step by step and provide clear, logical reasoning."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7 + (path_index * 0.1),  # Vary temperature for diversity
-                max_tokens=1000,
-            )
-            
-            content = response.choices[0].message.content
-            if not content:
+        async with semaphore:
+            try:
+                content = await self._complete_reasoning(query, context, path_index)
+                if not content:
+                    return None
+                
+                # Parse response into reasoning steps
+                steps, conclusion = self._parse_reasoning_response(content)
+                
+                return ReasoningPath(
+                    path_id=f"{self._id_prefix}-{next(self._id_counter):x}",
+                    query=query,
+                    reasoning_steps=steps,
+                    conclusion=conclusion,
+                    confidence_score=0.8,  # Will be refined by evaluation
+                    evaluation_score=0.0,  # Set during evaluation
+                    metadata={"path_index": path_index, "model": self.model},
+                )
+                
+            except Exception as e:
+                logger.error("Failed to generate reasoning path %d: %s", path_index, e)
                 return None
-            
-            # Parse response into reasoning steps
-            steps, conclusion = self._parse_reasoning_response(content)
-            
-            return ReasoningPath(
-                path_id=str(uuid4()),
-                query=query,
-                reasoning_steps=steps,
-                conclusion=conclusion,
-                confidence_score=0.8,  # Will be refined by evaluation
-                evaluation_score=0.0,  # Set during evaluation
-                metadata={"path_index": path_index, "model": self.model},
-            )
-            
-        except Exception as e:
-            logger.error(f"Failed to generate reasoning path {path_index}: {e}")
-            return None
+
+    async def _complete_reasoning(
+        self,
+        query: str,
+        context: Optional[str],
+        path_index: int,
+    ) -> Optional[str]:
+        """Get the raw reasoning text for a path, from cache when possible"""
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = ResponseCache.make_key(query, context, path_index, self.model)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        prompt = self._build_reasoning_prompt(query, context, path_index)
+        
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": "You are an expert legal reasoning assistant. Think step by step and provide clear, logical reasoning."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7 + (path_index * 0.1),  # Vary temperature for diversity
+            max_tokens=1000,
+        )
+        
+        content = response.choices[0].message.content
+        if cache_key is not None and content:
+            self.response_cache.put(cache_key, content)
+        return content
+
+    def cache_stats(self) -> dict:
+        """
+        Get hit/miss statistics for the reasoning path cache.
+        
+        Returns:
+            Response cache stats, or an empty dict when caching is disabled
+        """
+        return self.response_cache.stats() if self.response_cache is not None else {}
+
+    async def _fit_context(self, context: Optional[str]) -> Optional[str]:
+        """Cut context to the token budget once, before it fans out to every path"""
+        if not context:
+            return context
+        return await atruncate_to_tokens(context, self.max_context_tokens, self.model)
 
     def _build_reasoning_prompt(
         self,
@@ -153,17 +207,17 @@ Think carefully and consider multiple angles. This is reasoning path #{path_inde
                 continue
             
             # Detect conclusion section
-            if any(marker in line.lower() for marker in ['conclusion:', 'therefore:', 'in summary:']):
+            marker = _CONCLUSION_RE.search(line)
+            if marker:
                 in_conclusion = True
-                if ':' in line:
-                    conclusion = line.split(':', 1)[1].strip()
+                conclusion = line[marker.end():].strip()
                 continue
             
             if in_conclusion:
                 conclusion += " " + line
             else:
                 # Extract numbered steps
-                if line[0].isdigit() or line.startswith('-') or line.startswith('•'):
+                if _STEP_RE.match(line):
                     steps.append(line)
         
         if not conclusion and steps:
@@ -176,23 +230,93 @@ Think carefully and consider multiple angles. This is reasoning path #{path_inde
         """
         Evaluate reasoning paths to score their quality.
         
+        Paths are scored together in a single evaluator call per batch of
+        evaluation_batch_size paths, rather than one call per path.
+        
         Args:
             paths: List of reasoning paths to evaluate
             
         Returns:
             Paths with updated evaluation scores
         """
-        evaluation_tasks = [self._evaluate_single_path(path) for path in paths]
-        evaluated = await asyncio.gather(*evaluation_tasks, return_exceptions=True)
+        batches = [
+            paths[i:i + self.evaluation_batch_size]
+            for i in range(0, len(paths), self.evaluation_batch_size)
+        ]
+        # Batch evaluation falls back to per-path scoring instead of raising
+        evaluated = await asyncio.gather(*[self._evaluate_path_batch(batch) for batch in batches])
+        return [path for batch in evaluated for path in batch]
+
+    async def _evaluate_path_batch(self, paths: List[ReasoningPath]) -> List[ReasoningPath]:
+        """Score a batch of paths with one evaluator call"""
+        scores = None
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "You are an expert at evaluating logical reasoning. Respond only with JSON."},
+                    {"role": "user", "content": self._build_batch_evaluation_prompt(paths)}
+                ],
+                temperature=0.3,
+                max_tokens=20 + 8 * len(paths),
+            )
+            scores = self._parse_batch_scores(response.choices[0].message.content, len(paths))
+        except Exception as e:
+            logger.warning("Batched path evaluation failed: %s", e)
+        
+        if scores is None:
+            # Fall back to scoring each path on its own
+            logger.warning("Falling back to per-path evaluation for %d paths", len(paths))
+            return list(await asyncio.gather(*[self._evaluate_single_path(path) for path in paths]))
+        
+        for path, score in zip(paths, scores):
+            path.evaluation_score = score
+        return paths
+
+    def _build_batch_evaluation_prompt(self, paths: List[ReasoningPath]) -> str:
+        """Build one evaluation prompt covering every path in a batch"""
+        sections = [
+            f"""### PATH {i + 1}
+
+Reasoning Steps:
+{chr(10).join(path.reasoning_steps)}
+
+Conclusion: {path.conclusion}
+"""
+            for i, path in enumerate(paths)
+        ]
         
-        result_paths = []
-        for result in evaluated:
-            if isinstance(result, Exception):
-                logger.error(f"Path evaluation failed: {result}")
-            elif result:
-                result_paths.append(result)
+        return f"""Evaluate the quality of each of the following reasoning paths:
+
+Query: {paths[0].query}
+
+{chr(10).join(sections)}
+Rate each path on a scale of 0.0 to 1.0 based on:
+- Logical consistency
+- Relevance to the query
+- Completeness
+- Clarity
+
+Respond with only a JSON object of the form {{"scores": [...]}} containing
+{len(paths)} numbers between 0.0 and 1.0, in path order.
+"""
+
+    def _parse_batch_scores(self, content: Optional[str], expected: int) -> Optional[List[float]]:
+        """Parse the scores list from a batch evaluation response"""
+        if not content:
+            return None
+        
+        match = _JSON_OBJECT_RE.search(content)
+        if not match:
+            return None
         
-        return result_paths
+        try:
+            scores = json.loads(match.group())["scores"]
+            if len(scores) != expected:
+                return None
+            return [max(0.0, min(1.0, float(score))) for score in scores]
+        except (ValueError, TypeError, KeyError):
+            return None
 
     async def _evaluate_single_path(self, path: ReasoningPath) -> ReasoningPath:
         """Evaluate a single reasoning path"""
@@ -215,25 +339,36 @@ Rate this reasoning on a scale of 0.0 to 1.0 based on:
 Provide only a number between 0.0 and 1.0.
 """
             
-            response = await self.client.chat.completions.create(
+            # Stream the reply and hang up as soon as a complete score arrives
+            stream = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are an expert at evaluating logical reasoning. Provide only a numerical score."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.3,
-                max_tokens=10,
+                max_tokens=6,
+                stream=True,
             )
             
-            content = response.choices[0].message.content
+            content = ""
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        content += chunk.choices[0].delta.content
+                        if _COMPLETE_SCORE_RE.search(content):
+                            break
+            finally:
+                await stream.close()
+            
             if content:
                 # Extract number from response
-                score = float(''.join(c for c in content if c.isdigit() or c == '.'))
+                score = float(_SCORE_RE.search(content).group())
                 score = max(0.0, min(1.0, score))
                 path.evaluation_score = score
             
         except Exception as e:
-            logger.error(f"Failed to evaluate path: {e}")
+            logger.error("Failed to evaluate path: %s", e)
             path.evaluation_score = 0.5  # Default middle score
         
         return path
@@ -258,25 +393,91 @@ Provide only a number between 0.0 and 1.0.
         if not paths:
             raise ValueError("No paths provided for selection")
         
-        # Calculate combined score
-        for path in paths:
-            path.metadata["combined_score"] = (
-                path.evaluation_score * evaluation_weight +
-                path.confidence_score * confidence_weight
-            )
+        # Calculate combined scores in one vectorized pass; only the argmax
+        # is needed, so there is no sort
+        evaluation = np.fromiter((p.evaluation_score for p in paths), dtype=np.float64, count=len(paths))
+        confidence = np.fromiter((p.confidence_score for p in paths), dtype=np.float64, count=len(paths))
+        combined = evaluation * evaluation_weight + confidence * confidence_weight
         
-        # Sort by combined score
-        sorted_paths = sorted(
-            paths,
-            key=lambda p: p.metadata.get("combined_score", 0),
-            reverse=True
-        )
+        for path, score in zip(paths, combined.tolist()):
+            path.metadata["combined_score"] = score
         
-        best_path = sorted_paths[0]
-        logger.info(f"Selected best path with score: {best_path.metadata['combined_score']:.3f}")
+        # argmax returns the first maximum, matching the previous stable sort
+        best_path = paths[int(combined.argmax())]
+        logger.info("Selected best path with score: %.3f", best_path.metadata["combined_score"])
         
         return best_path
 
+    async def _generate_and_evaluate_paths(
+        self,
+        query: str,
+        context: Optional[str],
+    ) -> List[ReasoningPath]:
+        """
+        Generate reasoning paths and evaluate them as they complete.
+        
+        Finished paths go onto a queue; the consumer waits up to
+        evaluation_flush_interval after the first queued path (or until
+        evaluation_batch_size paths are ready) and scores that batch while
+        the remaining paths are still generating.
+        
+        Args:
+            query: The question or problem to reason about
+            context: Optional context information
+            
+        Returns:
+            Evaluated paths in path order
+        """
+        queue: asyncio.Queue[Optional[ReasoningPath]] = asyncio.Queue()
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        evaluated: List[ReasoningPath] = []
+        
+        async def produce(path_index: int) -> None:
+            path = await self._generate_single_path(query, context, path_index, semaphore)
+            if path is not None:
+                await queue.put(path)
+        
+        async def close_queue(producers: List[asyncio.Task]) -> None:
+            await asyncio.wait(producers)
+            await queue.put(None)
+        
+        async def evaluate(batch: List[ReasoningPath]) -> None:
+            evaluated.extend(await self._evaluate_path_batch(batch))
+        
+        loop = asyncio.get_running_loop()
+        async with asyncio.TaskGroup() as group:
+            producers = [group.create_task(produce(i)) for i in range(self.num_paths)]
+            group.create_task(close_queue(producers))
+            
+            finished = False
+            while not finished:
+                batch = [await queue.get()]
+                deadline = loop.time() + self.evaluation_flush_interval
+                
+                # Gather more paths until the batch fills or the window closes
+                while batch[-1] is not None and len(batch) < self.evaluation_batch_size:
+                    if not queue.empty():
+                        batch.append(queue.get_nowait())
+                        continue
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                
+                # The sentinel is always the last item queued
+                if batch[-1] is None:
+                    finished = True
+                    batch.pop()
+                if batch:
+                    group.create_task(evaluate(batch))
+        
+        evaluated.sort(key=lambda path: path.metadata["path_index"])
+        logger.info("Generated and evaluated %d reasoning paths for query", len(evaluated))
+        return evaluated
+
     async def reason(
         self,
         query: str,
@@ -292,27 +493,24 @@ Provide only a number between 0.0 and 1.0.
         Returns:
             Complete reasoning result with selected best path
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         
-        # Generate multiple reasoning paths
-        paths = await self.generate_reasoning_paths(query, context)
+        # Generate and evaluate paths as one pipeline
+        evaluated_paths = await self._generate_and_evaluate_paths(query, await self._fit_context(context))
         
-        if not paths:
+        if not evaluated_paths:
             raise ValueError("Failed to generate any reasoning paths")
         
-        # Evaluate all paths
-        evaluated_paths = await self.evaluate_paths(paths)
-        
         # Select best path
         best_path = await self.select_best_path(evaluated_paths)
         
-        processing_time = (time.time() - start_time) * 1000
+        processing_time = (time.perf_counter() - start_time) * 1000
         
         return ReasoningResult(
             query=query,
             paths=evaluated_paths,
             selected_path=best_path,
-            total_paths_generated=len(paths),
+            total_paths_generated=len(evaluated_paths),
             selection_method="weighted_score",
             processing_time_ms=processing_time,
         )
@@ -3,12 +3,13 @@ Resilience patterns for HERMES
 Circuit breakers, retry logic, and fault tolerance
 """
 
-from .circuit_breaker import CircuitBreaker, CircuitBreakerState
+from .circuit_breaker import CircuitBreaker, CircuitBreakerState, CircuitOpenError
 from .retry import RetryPolicy, exponential_backoff, retry_async
 
 __all__ = [
     "CircuitBreaker",
     "CircuitBreakerState",
+    "CircuitOpenError",
     "RetryPolicy",
     "exponential_backoff",
     "retry_async",
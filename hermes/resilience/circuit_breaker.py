@@ -6,6 +6,7 @@ September 2025 best practices for fault tolerance
 import asyncio
 import logging
 import time
+import weakref
 from enum import Enum
 from typing import Any, Callable, Optional, TypeVar
 
@@ -13,6 +14,33 @@ logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
 
+# Fallbacks are usually long-lived functions, so remember whether each one is
+# a coroutine function instead of introspecting it on every call
+_CORO_CHECK_CACHE: "weakref.WeakKeyDictionary[Callable[..., Any], bool]" = weakref.WeakKeyDictionary()
+
+
+def _is_coro(func: Callable[..., Any]) -> bool:
+    """Cached asyncio.iscoroutinefunction"""
+    result = _CORO_CHECK_CACHE.get(func)
+    if result is None:
+        result = asyncio.iscoroutinefunction(func)
+        try:
+            _CORO_CHECK_CACHE[func] = result
+        except TypeError:
+            # Not weak-referenceable (e.g. builtins); nothing to cache
+            pass
+    return result
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a call is rejected because the circuit is OPEN"""
+
+    __slots__ = ("breaker_name",)
+
+    def __init__(self, breaker_name: str):
+        super().__init__(f"Circuit breaker [{breaker_name}] is OPEN")
+        self.breaker_name = breaker_name
+
 
 class CircuitBreakerState(Enum):
     """Circuit breaker states"""
@@ -61,7 +89,7 @@ class CircuitBreaker:
         self.state = CircuitBreakerState.CLOSED
         self.failure_count = 0
         self.success_count = 0
-        self.last_failure_time: Optional[float] = None
+        self.last_failure_time: Optional[float] = None  # time.monotonic() reading
         self._lock = asyncio.Lock()
 
     async def call(
@@ -84,22 +112,24 @@ class CircuitBreaker:
             Result from func or fallback
             
         Raises:
-            Exception: If circuit is open and no fallback provided
+            CircuitOpenError: If circuit is open and no fallback provided
         """
-        async with self._lock:
-            # Check if we should attempt recovery
-            if self.state == CircuitBreakerState.OPEN:
-                if self._should_attempt_recovery():
-                    logger.info(f"Circuit breaker [{self.name}]: Attempting recovery (HALF_OPEN)")
-                    self.state = CircuitBreakerState.HALF_OPEN
-                    self.success_count = 0
-                else:
-                    # Circuit still open, use fallback if available
-                    if fallback:
-                        logger.warning(f"Circuit breaker [{self.name}]: OPEN, using fallback")
-                        return await fallback(*args, **kwargs) if asyncio.iscoroutinefunction(fallback) else fallback(*args, **kwargs)
+        # Fast path: a CLOSED breaker needs no lock just to read its state
+        if self.state is not CircuitBreakerState.CLOSED:
+            async with self._lock:
+                # Check if we should attempt recovery
+                if self.state is CircuitBreakerState.OPEN:
+                    if self._should_attempt_recovery():
+                        logger.info("Circuit breaker [%s]: Attempting recovery (HALF_OPEN)", self.name)
+                        self.state = CircuitBreakerState.HALF_OPEN
+                        self.success_count = 0
                     else:
-                        raise Exception(f"Circuit breaker [{self.name}] is OPEN")
+                        # Circuit still open, use fallback if available
+                        if fallback:
+                            logger.warning("Circuit breaker [%s]: OPEN, using fallback", self.name)
+                            return await fallback(*args, **kwargs) if _is_coro(fallback) else fallback(*args, **kwargs)
+                        else:
+                            raise CircuitOpenError(self.name)
         
         # Attempt to execute the function
         try:
@@ -114,17 +144,17 @@ class CircuitBreaker:
             return result
             
         except asyncio.TimeoutError as e:
-            logger.error(f"Circuit breaker [{self.name}]: Timeout after {self.timeout}s")
+            logger.error("Circuit breaker [%s]: Timeout after %ss", self.name, self.timeout)
             await self._on_failure()
             raise
         except Exception as e:
-            logger.error(f"Circuit breaker [{self.name}]: Failure - {e}")
+            logger.error("Circuit breaker [%s]: Failure - %s", self.name, e)
             await self._on_failure()
             
             # Try fallback
             if fallback:
-                logger.info(f"Circuit breaker [{self.name}]: Using fallback after failure")
-                return await fallback(*args, **kwargs) if asyncio.iscoroutinefunction(fallback) else fallback(*args, **kwargs)
+                logger.info("Circuit breaker [%s]: Using fallback after failure", self.name)
+                return await fallback(*args, **kwargs) if _is_coro(fallback) else fallback(*args, **kwargs)
             raise
 
     def _should_attempt_recovery(self) -> bool:
@@ -132,53 +162,55 @@ class CircuitBreaker:
         if self.last_failure_time is None:
             return True
         
-        time_since_failure = time.time() - self.last_failure_time
+        time_since_failure = time.monotonic() - self.last_failure_time
         return time_since_failure >= self.recovery_timeout
 
     async def _on_success(self) -> None:
         """Handle successful call"""
+        if self.state is CircuitBreakerState.CLOSED:
+            # Reset failure count on success; a plain store needs no lock
+            self.failure_count = 0
+            return
+        
         async with self._lock:
-            if self.state == CircuitBreakerState.HALF_OPEN:
+            if self.state is CircuitBreakerState.HALF_OPEN:
                 self.success_count += 1
                 logger.info(
-                    f"Circuit breaker [{self.name}]: Success in HALF_OPEN "
-                    f"({self.success_count}/{self.success_threshold})"
+                    "Circuit breaker [%s]: Success in HALF_OPEN (%d/%d)",
+                    self.name, self.success_count, self.success_threshold,
                 )
                 
                 if self.success_count >= self.success_threshold:
                     # Recovered successfully
-                    logger.info(f"Circuit breaker [{self.name}]: Recovered, closing circuit")
+                    logger.info("Circuit breaker [%s]: Recovered, closing circuit", self.name)
                     self.state = CircuitBreakerState.CLOSED
                     self.failure_count = 0
                     self.success_count = 0
-            elif self.state == CircuitBreakerState.CLOSED:
-                # Reset failure count on success
-                self.failure_count = 0
 
     async def _on_failure(self) -> None:
         """Handle failed call"""
         async with self._lock:
             self.failure_count += 1
-            self.last_failure_time = time.time()
+            self.last_failure_time = time.monotonic()
             
-            if self.state == CircuitBreakerState.HALF_OPEN:
+            if self.state is CircuitBreakerState.HALF_OPEN:
                 # Failed during recovery attempt
-                logger.warning(f"Circuit breaker [{self.name}]: Failed during recovery, reopening")
+                logger.warning("Circuit breaker [%s]: Failed during recovery, reopening", self.name)
                 self.state = CircuitBreakerState.OPEN
                 self.success_count = 0
-            elif self.state == CircuitBreakerState.CLOSED:
+            elif self.state is CircuitBreakerState.CLOSED:
                 if self.failure_count >= self.failure_threshold:
                     # Too many failures, open circuit
                     logger.error(
-                        f"Circuit breaker [{self.name}]: Threshold reached "
-                        f"({self.failure_count}/{self.failure_threshold}), opening circuit"
+                        "Circuit breaker [%s]: Threshold reached (%d/%d), opening circuit",
+                        self.name, self.failure_count, self.failure_threshold,
                     )
                     self.state = CircuitBreakerState.OPEN
 
     async def reset(self) -> None:
         """Manually reset the circuit breaker"""
         async with self._lock:
-            logger.info(f"Circuit breaker [{self.name}]: Manual reset")
+            logger.info("Circuit breaker [%s]: Manual reset", self.name)
             self.state = CircuitBreakerState.CLOSED
             self.failure_count = 0
             self.success_count = 0
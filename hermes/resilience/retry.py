@@ -9,6 +9,8 @@ import random
 from functools import wraps
 from typing import Any, Callable, Optional, Sequence, Type, TypeVar
 
+from .circuit_breaker import CircuitOpenError
+
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
@@ -42,7 +44,18 @@ class RetryPolicy:
         self.max_delay = max_delay
         self.exponential_base = exponential_base
         self.jitter = jitter
-        self.retriable_exceptions = retriable_exceptions or (Exception,)
+        # isinstance needs a tuple; catching Exception itself needs no check
+        self.retriable_exceptions = tuple(retriable_exceptions) if retriable_exceptions else (Exception,)
+        self._retry_all = Exception in self.retriable_exceptions
+        
+        # Private generator so policies don't share the module-level RNG
+        self._rng = random.Random()
+        
+        # Un-jittered delay for each attempt, computed once
+        self._base_delays = tuple(
+            min(initial_delay * (exponential_base ** attempt), max_delay)
+            for attempt in range(max_attempts)
+        )
 
     def calculate_delay(self, attempt: int) -> float:
         """
@@ -54,15 +67,15 @@ class RetryPolicy:
         Returns:
             Delay in seconds
         """
-        # Exponential backoff
-        delay = self.initial_delay * (self.exponential_base ** attempt)
-        
-        # Cap at max_delay
-        delay = min(delay, self.max_delay)
+        # Exponential backoff capped at max_delay, precomputed per attempt
+        if attempt < len(self._base_delays):
+            delay = self._base_delays[attempt]
+        else:
+            delay = min(self.initial_delay * (self.exponential_base ** attempt), self.max_delay)
         
         # Add jitter to prevent thundering herd
         if self.jitter:
-            delay *= (0.5 + random.random())
+            delay *= (0.5 + self._rng.random())
         
         return delay
 
@@ -80,7 +93,7 @@ class RetryPolicy:
         if attempt >= self.max_attempts:
             return False
         
-        return isinstance(exception, self.retriable_exceptions)
+        return self._retry_all or isinstance(exception, self.retriable_exceptions)
 
 
 def retry_async(
@@ -114,47 +127,63 @@ def retry_async(
         )
 
     def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
-        @wraps(func)
-        async def wrapper(*args: Any, **kwargs: Any) -> Any:
-            last_exception = None
+        # Resolve policy and function attributes once, not on every call
+        max_attempts = policy.max_attempts
+        should_retry = policy.should_retry
+        calculate_delay = policy.calculate_delay
+        name = func.__name__
+        sleep = asyncio.sleep
+        
+        async def retry(first_exception: Exception, args: tuple, kwargs: dict) -> Any:
+            last_exception = first_exception
             
-            for attempt in range(policy.max_attempts):
+            for attempt in range(1, max_attempts):
+                # Back off after the previous failed attempt
+                delay = calculate_delay(attempt - 1)
+                logger.warning(
+                    "%s failed (attempt %d/%d): %s. Retrying in %.2fs...",
+                    name, attempt, max_attempts, last_exception, delay,
+                )
+                await sleep(delay)
+                
                 try:
                     result = await func(*args, **kwargs)
-                    
-                    # Success - log retry stats if this wasn't first attempt
-                    if attempt > 0:
-                        logger.info(
-                            f"{func.__name__} succeeded on attempt {attempt + 1}/{policy.max_attempts}"
-                        )
-                    
-                    return result
-                    
+                except CircuitOpenError:
+                    # The breaker is already failing fast; backing off won't help
+                    raise
                 except Exception as e:
                     last_exception = e
                     
-                    if not policy.should_retry(e, attempt):
+                    if not should_retry(e, attempt):
                         # Don't retry this exception or out of attempts
                         logger.error(
-                            f"{func.__name__} failed after {attempt + 1} attempts: {e}"
+                            "%s failed after %d attempts: %s", name, attempt + 1, e
                         )
                         raise
-                    
-                    # Calculate delay and retry
-                    delay = policy.calculate_delay(attempt)
-                    logger.warning(
-                        f"{func.__name__} failed (attempt {attempt + 1}/{policy.max_attempts}): {e}. "
-                        f"Retrying in {delay:.2f}s..."
-                    )
-                    
-                    await asyncio.sleep(delay)
+                    continue
+                
+                logger.info("%s succeeded on attempt %d/%d", name, attempt + 1, max_attempts)
+                return result
             
             # Exhausted all retries
-            logger.error(
-                f"{func.__name__} failed after {policy.max_attempts} attempts"
-            )
+            logger.error("%s failed after %d attempts", name, max_attempts)
             raise last_exception
         
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            # Fast path: most calls succeed on the first attempt
+            try:
+                return await func(*args, **kwargs)
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                if not should_retry(e, 0):
+                    logger.error("%s failed after 1 attempts: %s", name, e)
+                    raise
+                first_exception = e
+            
+            return await retry(first_exception, args, kwargs)
+        
         return wrapper
     return decorator
 
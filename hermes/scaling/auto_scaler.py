@@ -3,14 +3,20 @@ Enterprise-grade auto-scaling and resource optimization system for HERMES.
 """
 
 import asyncio
+import gc
 import logging
+import math
+import os
 import time
 import json
-from typing import Dict, Any, Optional, List, Callable
-from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from collections import deque
+from itertools import islice
+from typing import Dict, Any, Optional, List, Callable, Deque, Iterable, Tuple
+from dataclasses import dataclass, field, fields, replace
+from datetime import datetime
 from enum import Enum
 
+import numpy as np
 import psutil
 import httpx
 
@@ -19,6 +25,45 @@ from ..monitoring.enhanced_metrics import metrics_collector
 
 logger = logging.getLogger(__name__)
 
+# Metrics are sampled every METRICS_INTERVAL_SECONDS and kept for
+# METRICS_WINDOW_SECONDS, so the history never needs more slots than this
+METRICS_INTERVAL_SECONDS = 30
+METRICS_WINDOW_SECONDS = 3600
+METRICS_HISTORY_SIZE = math.ceil(METRICS_WINDOW_SECONDS / METRICS_INTERVAL_SECONDS)
+
+# Cloud metadata probes: per-request limits, and a cap on detection as a whole
+CLOUD_PROBE_CONNECT_TIMEOUT_SECONDS = 0.3
+CLOUD_PROBE_READ_TIMEOUT_SECONDS = 0.5
+CLOUD_PROBE_TIMEOUT = httpx.Timeout(
+    CLOUD_PROBE_READ_TIMEOUT_SECONDS, connect=CLOUD_PROBE_CONNECT_TIMEOUT_SECONDS
+)
+# Never shorter than one probe's own budget, so a slow-but-successful probe
+# is not cut off by the overall deadline
+CLOUD_DETECTION_TIMEOUT_SECONDS = CLOUD_PROBE_CONNECT_TIMEOUT_SECONDS + CLOUD_PROBE_READ_TIMEOUT_SECONDS + 0.2
+
+# Requests per second are averaged over this sliding window
+RPS_WINDOW_SECONDS = 60.0
+
+# Only the most recent scaling events are ever reported
+SCALING_EVENTS_HISTORY_SIZE = 100
+
+# One background loop ticks every METRICS_INTERVAL_SECONDS; scaling is evaluated
+# and resources optimized on every Nth tick
+EVALUATION_INTERVAL_TICKS = 60 // METRICS_INTERVAL_SECONDS  # Evaluate every minute
+OPTIMIZATION_INTERVAL_TICKS = 300 // METRICS_INTERVAL_SECONDS  # Optimize every 5 minutes
+
+# Python 3.12+ can start a task eagerly, so a coroutine step that finishes
+# without suspending skips a trip through the event loop
+_EAGER_TASK_FACTORY = getattr(asyncio, "eager_task_factory", None)
+
+
+def _create_task(coro) -> asyncio.Task:
+    """Start one of the auto-scaler's own tasks, eagerly where supported."""
+    if _EAGER_TASK_FACTORY is not None:
+        return _EAGER_TASK_FACTORY(asyncio.get_running_loop(), coro)
+    return asyncio.create_task(coro)
+
+
 class ScalingDirection(Enum):
     """Scaling direction options."""
     UP = "up"
@@ -41,7 +86,7 @@ class MemoryPressureLevel(Enum):
     HIGH = "high"
     CRITICAL = "critical"
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ScalingRule:
     """Configuration for scaling rules."""
     name: str
@@ -54,7 +99,7 @@ class ScalingRule:
     evaluation_window_seconds: int = 60
     enabled: bool = True
 
-@dataclass
+@dataclass(slots=True)
 class ScalingMetrics:
     """Current scaling metrics."""
     cpu_usage: float = 0.0
@@ -65,9 +110,83 @@ class ScalingMetrics:
     cache_hit_ratio: float = 0.0
     response_time_p95: float = 0.0
     error_rate: float = 0.0
-    timestamp: datetime = field(default_factory=datetime.utcnow)
+    timestamp: float = field(default_factory=time.monotonic)  # time.monotonic() at collection
+
+# Numeric ScalingMetrics fields, stored one column per field in MetricsRing
+METRIC_FIELDS = (
+    "cpu_usage",
+    "memory_usage",
+    "active_connections",
+    "requests_per_second",
+    "database_connections",
+    "cache_hit_ratio",
+    "response_time_p95",
+    "error_rate",
+)
+_INTEGER_METRIC_FIELDS = frozenset({"active_connections", "database_connections"})
+
+# Rule metric for each resource type as (column, scale, offset) over a sample
+# row: value = row[column] * scale + offset
+_RULE_METRICS = {
+    ResourceType.CPU: (METRIC_FIELDS.index("cpu_usage"), 1.0, 0.0),
+    ResourceType.MEMORY: (METRIC_FIELDS.index("memory_usage"), 1.0, 0.0),
+    ResourceType.CONNECTIONS: (METRIC_FIELDS.index("active_connections"), 1.0, 0.0),
+    ResourceType.REQUESTS_PER_SECOND: (METRIC_FIELDS.index("requests_per_second"), 1.0, 0.0),
+    ResourceType.DATABASE_CONNECTIONS: (METRIC_FIELDS.index("database_connections"), 1.0, 0.0),
+    ResourceType.CACHE_HIT_RATIO: (METRIC_FIELDS.index("cache_hit_ratio"), -100.0, 100.0),  # Invert for scaling logic
+}
+_NO_RULE_METRIC = (0, 0.0, 0.0)
+
+class MetricsRing:
+    """Fixed-capacity struct-of-arrays ring buffer of ScalingMetrics samples."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        # One row per sample; columns are views so a field or a whole sample
+        # can be read without copying
+        self.rows = np.zeros((capacity, len(METRIC_FIELDS)), dtype=np.float64)
+        self.columns: Dict[str, np.ndarray] = {
+            name: self.rows[:, i] for i, name in enumerate(METRIC_FIELDS)
+        }
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, metrics: ScalingMetrics) -> None:
+        """Write a sample into the next slot, overwriting the oldest when full."""
+        slot = self._next
+        for name, column in self.columns.items():
+            column[slot] = getattr(metrics, name)
+        self.timestamps[slot] = metrics.timestamp
+
+        self._next = (slot + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def slot(self, index: int) -> int:
+        """Map a chronological index (negative counts from newest) to a slot."""
+        if not -self._count <= index < self._count:
+            raise IndexError("metrics ring index out of range")
+        if index < 0:
+            index += self._count
+        return (self._next - self._count + index) % self.capacity
+
+    def row(self, index: int) -> np.ndarray:
+        """Return one sample's values in METRIC_FIELDS order."""
+        return self.rows[self.slot(index)]
+
+    def __getitem__(self, index: int) -> ScalingMetrics:
+        """Materialize one sample as a ScalingMetrics."""
+        slot = self.slot(index)
+        values = {
+            name: int(column[slot]) if name in _INTEGER_METRIC_FIELDS else float(column[slot])
+            for name, column in self.columns.items()
+        }
+        return ScalingMetrics(**values, timestamp=float(self.timestamps[slot]))
 
-@dataclass
+@dataclass(slots=True)
 class ScalingEvent:
     """Record of scaling events."""
     timestamp: datetime
@@ -79,6 +198,15 @@ class ScalingEvent:
     success: bool
     error_message: Optional[str] = None
 
+# ScalingRule fields that feed the compiled limit and threshold vectors
+_NUMERIC_RULE_FIELDS = (
+    "scale_up_threshold",
+    "scale_down_threshold",
+    "min_instances",
+    "max_instances",
+    "cooldown_seconds",
+)
+
 class AutoScaler:
     """Enterprise auto-scaling and resource optimization system."""
 
@@ -86,8 +214,12 @@ class AutoScaler:
         self.current_instances = 1
         self.target_instances = 1
 
+        # Monotonic time each rule last scaled; -inf means never. Sized by
+        # _compile_rules when the rules are assigned
+        self._scaled_at = np.full(0, -np.inf)
+
         # Scaling rules configuration
-        self.scaling_rules: List[ScalingRule] = [
+        self.scaling_rules = [
             ScalingRule(
                 name="cpu_scaling",
                 resource_type=ResourceType.CPU,
@@ -131,17 +263,26 @@ class AutoScaler:
         ]
 
         # Metrics tracking
-        self._metrics_history: List[ScalingMetrics] = []
-        self._scaling_events: List[ScalingEvent] = []
-        self._last_scaling_time: Dict[str, datetime] = {}
+        self._metrics_history = MetricsRing(METRICS_HISTORY_SIZE)
+        self._last_published: Optional[tuple] = None
+
+        # Arrival times (monotonic) of requests inside the RPS window
+        self._request_times: Deque[float] = deque()
+        self._scaling_events: Deque[ScalingEvent] = deque(maxlen=SCALING_EVENTS_HISTORY_SIZE)
 
-        # Background tasks
-        self._monitoring_task: Optional[asyncio.Task] = None
-        self._scaling_task: Optional[asyncio.Task] = None
-        self._optimization_task: Optional[asyncio.Task] = None
+        # Status snapshots, rebuilt only when rules, cooldowns or events change
+        self._rules_snapshot: Optional[Tuple[Dict[str, Any], ...]] = None
+        self._rules_snapshot_expires = math.inf
+        self._events_snapshot: Optional[Tuple[Dict[str, Any], ...]] = None
+
+        # Background task
+        self._driver_task: Optional[asyncio.Task] = None
 
         self._initialized = False
 
+        # Deployment environment, detected once; it doesn't change at runtime
+        self._environment: Optional[Dict[str, Any]] = None
+
         # Resource optimization settings
         self.gc_threshold_memory_mb = 1000  # Trigger GC at 1GB
         self.cache_cleanup_threshold = 0.9  # Clean cache at 90% capacity
@@ -149,20 +290,25 @@ class AutoScaler:
     async def initialize(self) -> bool:
         """Initialize the auto-scaler system."""
         try:
-            # Detect current deployment environment
-            deployment_info = await self._detect_deployment_environment()
-            logger.info(f"Detected deployment environment: {deployment_info}")
+            # Prime the CPU counters so the first non-blocking sample is meaningful
+            psutil.cpu_percent(interval=None)
 
-            # Start background monitoring tasks
-            self._monitoring_task = asyncio.create_task(self._monitor_metrics())
-            self._scaling_task = asyncio.create_task(self._evaluate_scaling())
-            self._optimization_task = asyncio.create_task(self._optimize_resources())
+            # Detect current deployment environment
+            self._environment = await self._detect_deployment_environment()
+            logger.info(f"Detected deployment environment: {self._environment}")
 
+            # The background loop runs while _initialized is set, and eager
+            # tasks start running before create returns
             self._initialized = True
+
+            # Start background monitoring, scaling and optimization
+            self._driver_task = _create_task(self._driver_loop())
+
             logger.info("Auto-scaler system initialized successfully")
             return True
 
         except Exception as e:
+            self._initialized = False
             logger.error(f"Failed to initialize auto-scaler: {e}")
             return False
 
@@ -177,7 +323,7 @@ class AutoScaler:
 
         try:
             # Check for Kubernetes environment
-            if await self._check_kubernetes():
+            if self._check_kubernetes():
                 environment_info.update({
                     "platform": "kubernetes",
                     "orchestrator": "kubernetes",
@@ -185,7 +331,7 @@ class AutoScaler:
                 })
 
             # Check for Docker environment
-            elif await self._check_docker():
+            elif self._check_docker():
                 environment_info.update({
                     "platform": "docker",
                     "container_runtime": "docker",
@@ -203,84 +349,124 @@ class AutoScaler:
 
         return environment_info
 
-    async def _check_kubernetes(self) -> bool:
+    def _check_kubernetes(self) -> bool:
         """Check if running in Kubernetes environment."""
-        try:
-            # Check for Kubernetes service account
-            import os
-            return (
-                os.path.exists("/var/run/secrets/kubernetes.io/serviceaccount") or
-                "KUBERNETES_SERVICE_HOST" in os.environ
-            )
-        except:
-            return False
+        # Check for Kubernetes service account
+        return (
+            os.path.exists("/var/run/secrets/kubernetes.io/serviceaccount") or
+            "KUBERNETES_SERVICE_HOST" in os.environ
+        )
 
-    async def _check_docker(self) -> bool:
+    def _check_docker(self) -> bool:
         """Check if running in Docker container."""
+        # Docker drops this marker file into every container; checking it is
+        # cheaper than reading the cgroup table
+        if os.path.exists("/.dockerenv"):
+            return True
+
         try:
-            # Check for Docker-specific files
-            import os
-            return (
-                os.path.exists("/.dockerenv") or
-                os.path.exists("/proc/1/cgroup") and "docker" in open("/proc/1/cgroup").read()
-            )
-        except:
+            with open("/proc/1/cgroup", "rb") as f:
+                cgroups = f.read()
+        except OSError:
             return False
 
+        return b"docker" in cgroups or b"containerd" in cgroups
+
     async def _detect_cloud_provider(self) -> Optional[str]:
         """Detect cloud provider from metadata services."""
-        providers = {
-            "aws": "http://169.254.169.254/latest/meta-data/",
-            "gcp": "http://metadata.google.internal/computeMetadata/v1/",
-            "azure": "http://169.254.169.254/metadata/instance"
-        }
+        providers = [
+            ("aws", "http://169.254.169.254/latest/meta-data/", {}),
+            ("gcp", "http://metadata.google.internal/computeMetadata/v1/", {"Metadata-Flavor": "Google"}),
+            ("azure", "http://169.254.169.254/metadata/instance", {}),
+        ]
 
-        for provider, url in providers.items():
+        async def probe(client: httpx.AsyncClient, url: str, headers: Dict[str, str]) -> bool:
+            try:
+                response = await client.get(url, headers=headers)
+            except httpx.HTTPError:
+                return False
+            return response.status_code == 200
+
+        # Probe all providers at once over one client and take the first
+        # that answers 200; metadata services are link-local, so they answer
+        # fast or not at all
+        async with httpx.AsyncClient(timeout=CLOUD_PROBE_TIMEOUT) as client:
+            pending = {
+                asyncio.create_task(probe(client, url, headers)): provider
+                for provider, url, headers in providers
+            }
+            deadline = time.monotonic() + CLOUD_DETECTION_TIMEOUT_SECONDS
             try:
-                async with httpx.AsyncClient(timeout=2) as client:
-                    headers = {"Metadata-Flavor": "Google"} if provider == "gcp" else {}
-                    response = await client.get(url, headers=headers)
-                    if response.status_code == 200:
-                        return provider
-            except:
-                continue
+                while pending:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    done, _ = await asyncio.wait(
+                        pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not done:
+                        break
+                    for task in done:
+                        provider = pending.pop(task)
+                        if task.result():
+                            return provider
+            finally:
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
 
         return None
 
-    async def _monitor_metrics(self):
-        """Background task to monitor scaling metrics."""
+    async def _driver_loop(self):
+        """Background task driving metrics collection, scaling and optimization."""
+        tick = 0
         while self._initialized:
-            try:
-                current_metrics = await self._collect_current_metrics()
+            await self._monitor_metrics()
+
+            # Evaluate right after collecting so decisions see the freshest sample
+            if tick % EVALUATION_INTERVAL_TICKS == 0:
+                await self._evaluate_scaling()
 
-                # Add to history
-                self._metrics_history.append(current_metrics)
+            if tick % OPTIMIZATION_INTERVAL_TICKS == 0:
+                await self._optimize_resources()
 
-                # Keep only last hour of metrics
-                cutoff_time = datetime.utcnow() - timedelta(hours=1)
-                self._metrics_history = [
-                    m for m in self._metrics_history if m.timestamp > cutoff_time
-                ]
+            tick += 1
+            await asyncio.sleep(METRICS_INTERVAL_SECONDS)
 
-                # Update Prometheus metrics
+    async def _monitor_metrics(self):
+        """Collect and record one metrics sample."""
+        try:
+            current_metrics = await self._collect_current_metrics()
+
+            # Add to history; the ring overwrites samples older than the
+            # metrics window
+            self._metrics_history.append(current_metrics)
+
+            # Update Prometheus metrics, skipping the gauge writes when
+            # nothing changed since the last sample
+            published = (
+                current_metrics.cache_hit_ratio,
+                int(current_metrics.memory_usage * 1024 * 1024)
+            )
+            if published != self._last_published:
                 metrics_collector.update_cache_metrics(
                     cache_type="application",
-                    hit_ratio=current_metrics.cache_hit_ratio,
+                    hit_ratio=published[0],
                     items_count=0,  # Would be populated from actual cache
-                    memory_usage=int(current_metrics.memory_usage * 1024 * 1024)
+                    memory_usage=published[1]
                 )
+                self._last_published = published
 
-                await asyncio.sleep(30)  # Collect metrics every 30 seconds
-
-            except Exception as e:
-                logger.error(f"Metrics monitoring error: {e}")
-                await asyncio.sleep(60)
+        except Exception as e:
+            logger.error(f"Metrics monitoring error: {e}")
 
     async def _collect_current_metrics(self) -> ScalingMetrics:
         """Collect current system metrics for scaling decisions."""
         try:
             # System metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # Non-blocking: usage since the previous call, i.e. over the
+            # monitoring interval
+            cpu_percent = psutil.cpu_percent(interval=None)
             memory = psutil.virtual_memory()
             memory_percent = memory.percent
 
@@ -307,65 +493,60 @@ class AutoScaler:
             logger.error(f"Error collecting metrics: {e}")
             return ScalingMetrics()
 
-    def _calculate_rps(self) -> float:
-        """Calculate requests per second from recent metrics."""
-        if len(self._metrics_history) < 2:
-            return 0.0
+    def record_request(self):
+        """Count one handled request towards the requests-per-second metric."""
+        now = time.monotonic()
+        self._request_times.append(now)
+        self._evict_request_times(now)
 
-        # Simple RPS calculation from metrics history
-        recent_window = self._metrics_history[-10:]  # Last 5 minutes
-        if len(recent_window) < 2:
-            return 0.0
+    def _evict_request_times(self, now: float):
+        """Drop request times that have left the RPS window."""
+        cutoff = now - RPS_WINDOW_SECONDS
+        request_times = self._request_times
+        while request_times and request_times[0] < cutoff:
+            request_times.popleft()
 
-        # This would be calculated from actual request metrics
-        return 50.0  # Placeholder
+    def _calculate_rps(self) -> float:
+        """Calculate requests per second over the sliding RPS window."""
+        self._evict_request_times(time.monotonic())
+        return len(self._request_times) / RPS_WINDOW_SECONDS
 
     async def _evaluate_scaling(self):
-        """Background task to evaluate scaling decisions."""
-        while self._initialized:
-            try:
-                if len(self._metrics_history) < 3:
-                    await asyncio.sleep(60)
-                    continue
-
-                current_metrics = self._metrics_history[-1]
-                scaling_decision = await self._make_scaling_decision(current_metrics)
+        """Evaluate the newest metrics and scale if the rules call for it."""
+        try:
+            if len(self._metrics_history) < 3:
+                return
 
-                if scaling_decision != ScalingDirection.STABLE:
-                    await self._execute_scaling(scaling_decision, current_metrics)
+            # Vote straight off the newest row; only build a ScalingMetrics
+            # when there is a scaling action to record
+            scaling_decision = self._decide(self._metrics_history.row(-1))
 
-                await asyncio.sleep(60)  # Evaluate every minute
+            if scaling_decision != ScalingDirection.STABLE:
+                await self._execute_scaling(scaling_decision, self._metrics_history[-1])
 
-            except Exception as e:
-                logger.error(f"Scaling evaluation error: {e}")
-                await asyncio.sleep(120)
+        except Exception as e:
+            logger.error(f"Scaling evaluation error: {e}")
 
-    async def _make_scaling_decision(self, current_metrics: ScalingMetrics) -> ScalingDirection:
+    def _make_scaling_decision(self, current_metrics: ScalingMetrics) -> ScalingDirection:
         """Make scaling decision based on current metrics."""
-        scale_up_votes = 0
-        scale_down_votes = 0
-        total_rules = 0
+        row = np.array([getattr(current_metrics, name) for name in METRIC_FIELDS], dtype=np.float64)
+        return self._decide(row)
 
-        for rule in self.scaling_rules:
-            if not rule.enabled:
-                continue
-
-            # Check cooldown
-            if self._is_in_cooldown(rule):
-                continue
-
-            total_rules += 1
-            metric_value = self._get_metric_value(current_metrics, rule.resource_type)
-
-            if metric_value > rule.scale_up_threshold:
-                scale_up_votes += 1
-            elif metric_value < rule.scale_down_threshold:
-                scale_down_votes += 1
+    def _decide(self, row: np.ndarray) -> ScalingDirection:
+        """Vote on a sample row (METRIC_FIELDS order) across all rules at once."""
+        # Rules that are enabled and out of cooldown get a vote
+        active = self._rule_enabled & (self._cooldown_until <= time.monotonic())
+        total_rules = int(active.sum())
 
         # Decision logic
         if total_rules == 0:
             return ScalingDirection.STABLE
 
+        values = row[self._rule_cols] * self._rule_scale + self._rule_offset
+        up = active & (values > self._up_thr)
+        scale_up_votes = int(up.sum())
+        scale_down_votes = int((active & ~up & (values < self._down_thr)).sum())
+
         # Require majority vote for scaling decisions
         vote_threshold = max(1, total_rules // 2)
 
@@ -378,37 +559,77 @@ class AutoScaler:
 
     def _get_metric_value(self, metrics: ScalingMetrics, resource_type: ResourceType) -> float:
         """Get metric value for specific resource type."""
-        if resource_type == ResourceType.CPU:
-            return metrics.cpu_usage
-        elif resource_type == ResourceType.MEMORY:
-            return metrics.memory_usage
-        elif resource_type == ResourceType.CONNECTIONS:
-            return metrics.active_connections
-        elif resource_type == ResourceType.REQUESTS_PER_SECOND:
-            return metrics.requests_per_second
-        elif resource_type == ResourceType.DATABASE_CONNECTIONS:
-            return metrics.database_connections
-        elif resource_type == ResourceType.CACHE_HIT_RATIO:
-            return (1.0 - metrics.cache_hit_ratio) * 100  # Invert for scaling logic
-        else:
-            return 0.0
+        column, scale, offset = _RULE_METRICS.get(resource_type, _NO_RULE_METRIC)
+        return getattr(metrics, METRIC_FIELDS[column]) * scale + offset
+
+    @property
+    def _cooldown_until(self) -> np.ndarray:
+        """Monotonic time at which each rule's cooldown ends."""
+        return self._scaled_at + self._cooldown_seconds
 
     def _is_in_cooldown(self, rule: ScalingRule) -> bool:
         """Check if rule is in cooldown period."""
-        last_scaling = self._last_scaling_time.get(rule.name)
-        if not last_scaling:
-            return False
-
-        cooldown_end = last_scaling + timedelta(seconds=rule.cooldown_seconds)
-        return datetime.utcnow() < cooldown_end
+        index = self._rule_index[rule.name]
+        return bool(self._cooldown_until[index] > time.monotonic())
+
+    @property
+    def scaling_rules(self) -> Tuple[ScalingRule, ...]:
+        """Scaling rules; immutable, so every change goes through the setter."""
+        return self._scaling_rules
+
+    @scaling_rules.setter
+    def scaling_rules(self, rules: Iterable[ScalingRule]):
+        self._compile_rules(tuple(rules))
+
+    def _compile_rules(self, rules: Tuple[ScalingRule, ...]):
+        """Precompute limits and threshold vectors and install them with the rules.
+
+        Everything is built before any attribute is assigned, so invalid rules
+        raise and leave the previous rules and vectors in place.
+        """
+        for rule in rules:
+            for name in _NUMERIC_RULE_FIELDS:
+                value = getattr(rule, name)
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    raise ValueError(f"Scaling rule {rule.name}: {name} must be a number, got {value!r}")
+
+        # No rules never vote, so the limits only need to be defined
+        max_cap = max((rule.max_instances for rule in rules), default=self.current_instances)
+        min_cap = max((rule.min_instances for rule in rules), default=self.current_instances)
+
+        metrics = [_RULE_METRICS.get(rule.resource_type, _NO_RULE_METRIC) for rule in rules]
+        rule_cols = np.array([col for col, _, _ in metrics], dtype=np.intp)
+        rule_scale = np.array([scale for _, scale, _ in metrics], dtype=np.float64)
+        rule_offset = np.array([offset for _, _, offset in metrics], dtype=np.float64)
+        up_thr = np.array([rule.scale_up_threshold for rule in rules], dtype=np.float64)
+        down_thr = np.array([rule.scale_down_threshold for rule in rules], dtype=np.float64)
+        rule_enabled = np.array([rule.enabled for rule in rules], dtype=bool)
+        cooldown_seconds = np.array([rule.cooldown_seconds for rule in rules], dtype=np.float64)
+
+        self._scaling_rules = rules
+        self._max_cap = max_cap
+        self._min_cap = min_cap
+        self._rule_cols = rule_cols
+        self._rule_scale = rule_scale
+        self._rule_offset = rule_offset
+        self._up_thr = up_thr
+        self._down_thr = down_thr
+        self._rule_enabled = rule_enabled
+        self._cooldown_seconds = cooldown_seconds
+        self._rule_index = {rule.name: i for i, rule in enumerate(rules)}
+        self._rules_snapshot = None
+
+        # Rule updates keep active cooldowns; a different rule set starts fresh
+        if len(self._scaled_at) != len(rules):
+            self._scaled_at = np.full(len(rules), -np.inf)
 
     def _get_max_instances(self) -> int:
         """Get maximum instances across all rules."""
-        return max(rule.max_instances for rule in self.scaling_rules)
+        return self._max_cap
 
     def _get_min_instances(self) -> int:
         """Get minimum instances across all rules."""
-        return max(rule.min_instances for rule in self.scaling_rules)
+        return self._min_cap
 
     async def _execute_scaling(self, direction: ScalingDirection, metrics: ScalingMetrics):
         """Execute scaling decision."""
@@ -443,6 +664,7 @@ class AutoScaler:
             )
 
             self._scaling_events.append(event)
+            self._events_snapshot = None
 
             if success:
                 self.current_instances = self.target_instances
@@ -451,8 +673,8 @@ class AutoScaler:
                 logger.error(f"Failed to scale {direction.value}")
 
             # Update cooldown times
-            for rule in self.scaling_rules:
-                self._last_scaling_time[rule.name] = datetime.utcnow()
+            self._scaled_at[:] = time.monotonic()
+            self._rules_snapshot = None
 
         except Exception as e:
             logger.error(f"Scaling execution error: {e}")
@@ -476,9 +698,12 @@ class AutoScaler:
             # This would integrate with the actual deployment platform
             # For now, we'll simulate scaling
 
-            if await self._check_kubernetes():
+            if self._environment is None:
+                self._environment = await self._detect_deployment_environment()
+
+            if self._environment["platform"] == "kubernetes":
                 return await self._scale_kubernetes(target_instances)
-            elif await self._detect_cloud_provider():
+            elif self._environment.get("cloud_provider"):
                 return await self._scale_cloud_platform(target_instances)
             else:
                 # Local/single instance - simulate scaling
@@ -511,30 +736,27 @@ class AutoScaler:
             return False
 
     async def _optimize_resources(self):
-        """Background task for resource optimization."""
-        while self._initialized:
-            try:
-                await self._perform_memory_optimization()
-                await self._perform_cache_optimization()
-                await self._perform_database_optimization()
-
-                await asyncio.sleep(300)  # Optimize every 5 minutes
+        """Run one round of resource optimization."""
+        try:
+            await self._perform_memory_optimization()
+            await self._perform_cache_optimization()
+            await self._perform_database_optimization()
 
-            except Exception as e:
-                logger.error(f"Resource optimization error: {e}")
-                await asyncio.sleep(600)
+        except Exception as e:
+            logger.error(f"Resource optimization error: {e}")
 
     async def _perform_memory_optimization(self):
         """Perform memory optimization tasks."""
         try:
-            import gc
             memory = psutil.virtual_memory()
             memory_mb = memory.used / (1024 * 1024)
 
             if memory_mb > self.gc_threshold_memory_mb:
                 logger.info(f"Triggering garbage collection at {memory_mb:.1f}MB memory usage")
 
-                # Force garbage collection
+                # Force garbage collection on the loop thread: a collection
+                # holds the GIL throughout, and finalizers of loop-bound
+                # objects must not run on a worker thread
                 collected = gc.collect()
 
                 # Log results
@@ -597,18 +819,36 @@ class AutoScaler:
                 "cache_hit_ratio": current_metrics.cache_hit_ratio,
                 "error_rate": current_metrics.error_rate
             },
-            "rules": [
+            "rules": self._rules_status(),
+            "recent_events": self._events_status()
+        }
+
+    def _rules_status(self) -> List[Dict[str, Any]]:
+        """Rules block of the status, cached until a rule or cooldown changes."""
+        now = time.monotonic()
+        if self._rules_snapshot is None or now >= self._rules_snapshot_expires:
+            cooldown_until = self._cooldown_until
+            in_cooldown = cooldown_until > now
+            self._rules_snapshot = tuple(
                 {
                     "name": rule.name,
                     "resource_type": rule.resource_type.value,
                     "scale_up_threshold": rule.scale_up_threshold,
                     "scale_down_threshold": rule.scale_down_threshold,
                     "enabled": rule.enabled,
-                    "in_cooldown": self._is_in_cooldown(rule)
+                    "in_cooldown": bool(cooling)
                 }
-                for rule in self.scaling_rules
-            ],
-            "recent_events": [
+                for rule, cooling in zip(self.scaling_rules, in_cooldown)
+            )
+            # The snapshot goes stale when the next active cooldown ends
+            self._rules_snapshot_expires = float(cooldown_until[in_cooldown].min()) if in_cooldown.any() else math.inf
+        # Hand out copies so callers can't alter the cached snapshot
+        return [dict(entry) for entry in self._rules_snapshot]
+
+    def _events_status(self) -> List[Dict[str, Any]]:
+        """Recent events block of the status, cached until the next event."""
+        if self._events_snapshot is None:
+            self._events_snapshot = tuple(
                 {
                     "timestamp": event.timestamp.isoformat(),
                     "direction": event.direction.value,
@@ -617,18 +857,23 @@ class AutoScaler:
                     "reason": event.reason,
                     "success": event.success
                 }
-                for event in self._scaling_events[-10:]  # Last 10 events
-            ]
-        }
+                for event in islice(
+                    self._scaling_events, max(0, len(self._scaling_events) - 10), None
+                )  # Last 10 events
+            )
+        return [dict(entry) for entry in self._events_snapshot]
 
     async def update_scaling_rule(self, rule_name: str, **kwargs) -> bool:
         """Update a scaling rule configuration."""
         try:
-            for rule in self.scaling_rules:
+            rule_fields = {f.name for f in fields(ScalingRule)}
+            changes = {key: value for key, value in kwargs.items() if key in rule_fields}
+
+            for i, rule in enumerate(self.scaling_rules):
                 if rule.name == rule_name:
-                    for key, value in kwargs.items():
-                        if hasattr(rule, key):
-                            setattr(rule, key, value)
+                    rules = list(self.scaling_rules)
+                    rules[i] = replace(rule, **changes)
+                    self.scaling_rules = rules
 
                     logger.info(f"Updated scaling rule {rule_name}: {kwargs}")
                     return True
@@ -645,14 +890,13 @@ class AutoScaler:
         try:
             self._initialized = False
 
-            # Cancel background tasks
-            for task in [self._monitoring_task, self._scaling_task, self._optimization_task]:
-                if task:
-                    task.cancel()
-                    try:
-                        await task
-                    except asyncio.CancelledError:
-                        pass
+            # Cancel background task
+            if self._driver_task:
+                self._driver_task.cancel()
+                try:
+                    await self._driver_task
+                except asyncio.CancelledError:
+                    pass
 
             logger.info("Auto-scaler system cleaned up successfully")
 
@@ -9,7 +9,7 @@ import logging
 import os
 import sys
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 import structlog
 
@@ -121,6 +121,8 @@ class ComplianceLockdown:
     def __init__(self):
         self.compliance_violations = []
         self.lockdown_triggered = False
+        # Deployment environment doesn't change mid-process; check it once
+        self._saas_authorized: Optional[bool] = None
 
     def display_legal_notice(self):
         """Display legal notice on startup."""
@@ -134,7 +136,7 @@ class ComplianceLockdown:
         warnings = []
 
         # Check 1: Verify SaaS platform deployment
-        if not self._is_authorized_saas_deployment():
+        if not self._saas_deployment_authorized():
             violations.append("Unauthorized deployment - SaaS license required")
             self._trigger_compliance_lockdown("unauthorized_deployment")
 
@@ -162,32 +164,42 @@ class ComplianceLockdown:
 
         return result
 
+    def _saas_deployment_authorized(self) -> bool:
+        """Cached result of _is_authorized_saas_deployment."""
+        if self._saas_authorized is None:
+            self._saas_authorized = self._is_authorized_saas_deployment()
+        return self._saas_authorized
+
     def _is_authorized_saas_deployment(self) -> bool:
         """Check if this is an authorized SaaS deployment."""
 
+        environ = os.environ
+
         # Check for required SaaS environment variables
-        required_saas_vars = [
+        required_saas_vars = (
             "HERMES_LICENSE_KEY",
             "HERMES_TENANT_ID",
             "GOOGLE_CLOUD_PROJECT"  # Must be on GCP
-        ]
+        )
 
         for var in required_saas_vars:
-            if not os.getenv(var):
+            if not environ.get(var):
                 logger.warning(f"Missing required SaaS variable: {var}")
                 return False
 
-        # Check for prohibited self-hosting indicators
-        prohibited_indicators = [
-            "localhost" in os.getenv("DATABASE_URL", ""),
-            "127.0.0.1" in os.getenv("REDIS_URL", ""),
-            os.path.exists("/home"),  # Linux self-hosting
-            os.path.exists("/Users"),  # Mac self-hosting
-            "docker" in os.getenv("HOSTNAME", "").lower(),
-            os.getenv("KUBERNETES_SERVICE_HOST") and not os.getenv("GOOGLE_CLOUD_PROJECT")
-        ]
+        # Check for prohibited self-hosting indicators; evaluated lazily and
+        # cheapest first, so the filesystem is only touched if the
+        # environment looks clean
+        prohibited_indicators = (
+            lambda: "localhost" in environ.get("DATABASE_URL", ""),
+            lambda: "127.0.0.1" in environ.get("REDIS_URL", ""),
+            lambda: "docker" in environ.get("HOSTNAME", "").lower(),
+            lambda: environ.get("KUBERNETES_SERVICE_HOST") and not environ.get("GOOGLE_CLOUD_PROJECT"),
+            lambda: os.path.exists("/home"),  # Linux self-hosting
+            lambda: os.path.exists("/Users"),  # Mac self-hosting
+        )
 
-        if any(prohibited_indicators):
+        if any(check() for check in prohibited_indicators):
             logger.error("Self-hosting indicators detected")
             return False
 
@@ -198,10 +210,11 @@ class ComplianceLockdown:
 
         violations = []
         compliant_regulations = []
+        authorized = self._saas_deployment_authorized()
 
         for regulation, details in COMPLIANCE_REQUIREMENTS.items():
             if details["saas_only"]:
-                if not self._is_authorized_saas_deployment():
+                if not authorized:
                     violations.append(
                         f"{regulation} compliance requires SaaS deployment: {details['reason']}"
                     )
@@ -316,13 +329,15 @@ class ComplianceLockdown:
     def get_compliance_status(self) -> Dict[str, Any]:
         """Get current compliance status."""
 
+        authorized = self._saas_deployment_authorized()
+
         return {
             "compliant": not self.lockdown_triggered,
             "lockdown_triggered": self.lockdown_triggered,
             "violations": self.compliance_violations,
             "regulations": {
                 name: {
-                    "compliant": details["saas_only"] and self._is_authorized_saas_deployment(),
+                    "compliant": details["saas_only"] and authorized,
                     "requirements": details["requirements"],
                     "saas_only": details["saas_only"]
                 }
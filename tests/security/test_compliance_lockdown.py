@@ -0,0 +1,56 @@
+"""Security tests for compliance lockdown deployment checks."""
+
+import os
+from unittest.mock import patch
+
+from hermes.security.compliance_lockdown import ComplianceLockdown
+
+
+SAAS_ENV = {
+    "HERMES_LICENSE_KEY": "hl_test",
+    "HERMES_TENANT_ID": "tenant-123",
+    "GOOGLE_CLOUD_PROJECT": "hermes-prod",
+    "DATABASE_URL": "postgresql://db.internal/hermes",
+    "REDIS_URL": "redis://cache.internal:6379",
+    "HOSTNAME": "hermes-web-1",
+}
+
+
+def test_missing_license_skips_filesystem_checks():
+    """Test a missing SaaS variable fails before any filesystem probe."""
+    with patch.dict(os.environ, {}, clear=True), patch("os.path.exists") as exists:
+        assert not ComplianceLockdown()._is_authorized_saas_deployment()
+        exists.assert_not_called()
+
+
+def test_env_indicator_skips_filesystem_checks():
+    """Test an environment self-hosting indicator short-circuits the stat calls."""
+    env = dict(SAAS_ENV, DATABASE_URL="postgresql://localhost/hermes")
+    with patch.dict(os.environ, env, clear=True), patch("os.path.exists") as exists:
+        assert not ComplianceLockdown()._is_authorized_saas_deployment()
+        exists.assert_not_called()
+
+
+def test_clean_saas_deployment_is_authorized():
+    """Test a SaaS environment without self-hosting indicators is authorized."""
+    with patch.dict(os.environ, SAAS_ENV, clear=True), patch("os.path.exists", return_value=False):
+        assert ComplianceLockdown()._is_authorized_saas_deployment()
+
+
+def test_home_directory_indicates_self_hosting():
+    """Test filesystem indicators still fail a clean-looking environment."""
+    with patch.dict(os.environ, SAAS_ENV, clear=True), patch("os.path.exists", side_effect=lambda path: path == "/home"):
+        assert not ComplianceLockdown()._is_authorized_saas_deployment()
+
+
+def test_authorization_is_checked_once():
+    """Test compliance reports reuse one deployment check across regulations."""
+    lockdown = ComplianceLockdown()
+    with patch.object(lockdown, "_is_authorized_saas_deployment", return_value=True) as check:
+        requirements = lockdown._check_compliance_requirements()
+        status = lockdown.get_compliance_status()
+
+    check.assert_called_once()
+    assert requirements["violations"] == []
+    assert len(requirements["compliant_regulations"]) == requirements["total_regulations"]
+    assert all(regulation["compliant"] for regulation in status["regulations"].values())
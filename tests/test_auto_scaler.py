@@ -0,0 +1,548 @@
+"""
+Test auto-scaling decisions and bookkeeping
+"""
+
+import os
+os.environ["OPENAI_API_KEY"] = "test-key-123"
+os.environ["DEBUG"] = "true"
+
+import asyncio
+import pytest
+
+from datetime import datetime
+
+from hermes.scaling.auto_scaler import (
+    METRICS_HISTORY_SIZE,
+    RPS_WINDOW_SECONDS,
+    SCALING_EVENTS_HISTORY_SIZE,
+    AutoScaler,
+    MetricsRing,
+    ResourceType,
+    ScalingDirection,
+    ScalingEvent,
+    ScalingMetrics,
+    ScalingRule,
+)
+
+
+class TestMetricsHistory:
+    """Test bounded metrics history"""
+
+    def test_history_is_bounded(self):
+        """Test old samples are evicted once the window is full"""
+        scaler = AutoScaler()
+        
+        for i in range(METRICS_HISTORY_SIZE + 5):
+            scaler._metrics_history.append(ScalingMetrics(cpu_usage=float(i)))
+        
+        assert len(scaler._metrics_history) == METRICS_HISTORY_SIZE
+        assert scaler._metrics_history[-1].cpu_usage == METRICS_HISTORY_SIZE + 4
+        assert scaler._metrics_history[0].cpu_usage == 5.0
+
+    def test_ring_round_trips_samples(self):
+        """Test samples come back with their values, types and timestamps"""
+        ring = MetricsRing(capacity=3)
+        stamp = 12345.678
+        ring.append(ScalingMetrics(cpu_usage=12.5, active_connections=7, timestamp=stamp))
+        
+        sample = ring[-1]
+        
+        assert sample.cpu_usage == 12.5
+        assert sample.active_connections == 7
+        assert isinstance(sample.active_connections, int)
+        assert sample.timestamp == stamp
+
+    def test_samples_have_no_instance_dict(self):
+        """Test metrics samples are slotted to keep per-sample memory small"""
+        assert not hasattr(ScalingMetrics(), "__dict__")
+
+    def test_ring_wraps_in_chronological_order(self):
+        """Test indexing stays chronological after the ring wraps"""
+        ring = MetricsRing(capacity=3)
+        for i in range(5):
+            ring.append(ScalingMetrics(cpu_usage=float(i)))
+        
+        assert [ring[i].cpu_usage for i in range(3)] == [2.0, 3.0, 4.0]
+        assert ring.columns["cpu_usage"][ring.slot(-1)] == 4.0
+        with pytest.raises(IndexError):
+            ring[3]
+
+    @pytest.mark.asyncio
+    async def test_status_reports_latest_metrics(self):
+        """Test status reflects the most recent sample"""
+        scaler = AutoScaler()
+        scaler._metrics_history.append(ScalingMetrics(cpu_usage=10.0))
+        scaler._metrics_history.append(ScalingMetrics(cpu_usage=55.5, memory_usage=42.0))
+        
+        status = await scaler.get_scaling_status()
+        
+        assert status["metrics"]["cpu_usage"] == 55.5
+        assert status["metrics"]["memory_usage"] == 42.0
+        assert status["scaling"]["current_instances"] == 1
+
+
+class TestScalingStatus:
+    """Test cached status snapshots"""
+
+    @pytest.mark.asyncio
+    async def test_status_blocks_are_reused(self):
+        """Test rules and events are only rebuilt when they change"""
+        scaler = AutoScaler()
+        
+        first = await scaler.get_scaling_status()
+        snapshot = scaler._rules_snapshot
+        second = await scaler.get_scaling_status()
+        assert scaler._rules_snapshot is snapshot
+        assert first["rules"] == second["rules"]
+        
+        assert await scaler.update_scaling_rule("cpu_scaling", enabled=False)
+        rules = (await scaler.get_scaling_status())["rules"]
+        assert scaler._rules_snapshot is not snapshot
+        assert not next(rule for rule in rules if rule["name"] == "cpu_scaling")["enabled"]
+
+    @pytest.mark.asyncio
+    async def test_status_is_a_copy(self):
+        """Test callers mutating the status can't corrupt the cached snapshot"""
+        scaler = AutoScaler()
+        
+        status = await scaler.get_scaling_status()
+        status["rules"][0]["enabled"] = False
+        status["rules"].clear()
+        
+        rules = (await scaler.get_scaling_status())["rules"]
+        assert len(rules) == len(scaler.scaling_rules)
+        assert rules[0]["enabled"]
+
+    @pytest.mark.asyncio
+    async def test_replacing_rules_invalidates_status(self):
+        """Test assigning a new rule set refreshes the status and decisions"""
+        scaler = AutoScaler()
+        await scaler.get_scaling_status()
+        
+        scaler.scaling_rules = [
+            ScalingRule(
+                name="cpu_only",
+                resource_type=ResourceType.CPU,
+                scale_up_threshold=50.0,
+                scale_down_threshold=10.0,
+            )
+        ]
+        
+        rules = (await scaler.get_scaling_status())["rules"]
+        assert [rule["name"] for rule in rules] == ["cpu_only"]
+        assert scaler._make_scaling_decision(ScalingMetrics(cpu_usage=60.0)) == ScalingDirection.UP
+        
+        with pytest.raises(AttributeError):
+            scaler.scaling_rules.append(scaler.scaling_rules[0])
+        with pytest.raises(AttributeError):
+            scaler.scaling_rules[0].enabled = False
+
+    @pytest.mark.asyncio
+    async def test_invalid_rule_update_keeps_previous_rules(self):
+        """Test a rejected update leaves rules and limits untouched so later updates work"""
+        scaler = AutoScaler()
+        rules = scaler.scaling_rules
+        max_cap = scaler._get_max_instances()
+        
+        assert not await scaler.update_scaling_rule("cpu_scaling", max_instances=None)
+        assert scaler.scaling_rules == rules
+        assert scaler._get_max_instances() == max_cap
+        
+        assert await scaler.update_scaling_rule("cpu_scaling", scale_up_threshold=50.0)
+        assert scaler.scaling_rules[0].scale_up_threshold == 50.0
+        assert scaler._up_thr[0] == 50.0
+
+    def test_empty_rule_set_is_stable(self):
+        """Test a scaler with no rules never scales"""
+        scaler = AutoScaler()
+        scaler.scaling_rules = []
+        
+        assert scaler._make_scaling_decision(ScalingMetrics(cpu_usage=99.0)) == ScalingDirection.STABLE
+
+    @pytest.mark.asyncio
+    async def test_status_tracks_scaling_and_cooldown_expiry(self, monkeypatch):
+        """Test a scaling event refreshes the snapshot until cooldowns lapse"""
+        import time
+        
+        scaler = AutoScaler()
+        scaler._environment = {"platform": "unknown"}
+        await scaler.get_scaling_status()
+        
+        await scaler._execute_scaling(ScalingDirection.UP, ScalingMetrics(cpu_usage=95.0))
+        status = await scaler.get_scaling_status()
+        assert len(status["recent_events"]) == 1
+        assert all(rule["in_cooldown"] for rule in status["rules"])
+        
+        later = time.monotonic() + 3600
+        monkeypatch.setattr(time, "monotonic", lambda: later)
+        status = await scaler.get_scaling_status()
+        assert not any(rule["in_cooldown"] for rule in status["rules"])
+
+
+    @pytest.mark.asyncio
+    async def test_event_history_is_bounded(self):
+        """Test old events are dropped and status reports the last ten"""
+        scaler = AutoScaler()
+        for i in range(SCALING_EVENTS_HISTORY_SIZE + 5):
+            scaler._scaling_events.append(ScalingEvent(
+                timestamp=datetime.utcnow(),
+                direction=ScalingDirection.UP,
+                rule_name="composite",
+                from_instances=i,
+                to_instances=i + 1,
+                reason="test",
+                success=True,
+            ))
+        
+        status = await scaler.get_scaling_status()
+        
+        assert len(scaler._scaling_events) == SCALING_EVENTS_HISTORY_SIZE
+        assert [event["from_instances"] for event in status["recent_events"]] == list(
+            range(SCALING_EVENTS_HISTORY_SIZE - 5, SCALING_EVENTS_HISTORY_SIZE + 5)
+        )
+
+
+class TestScalingDecision:
+    """Test scaling votes"""
+
+    def test_high_load_scales_up(self):
+        """Test a majority of rules over threshold scales up"""
+        scaler = AutoScaler()
+        metrics = ScalingMetrics(cpu_usage=95.0, memory_usage=90.0, requests_per_second=150.0)
+        
+        assert scaler._make_scaling_decision(metrics) == ScalingDirection.UP
+
+    def test_idle_at_minimum_is_stable(self):
+        """Test an idle scaler already at its minimum does not scale down"""
+        scaler = AutoScaler()
+        
+        assert scaler._make_scaling_decision(ScalingMetrics()) == ScalingDirection.STABLE
+
+    def test_idle_scales_down(self):
+        """Test low usage above the minimum scales down"""
+        scaler = AutoScaler()
+        scaler.current_instances = 4
+        
+        assert scaler._make_scaling_decision(ScalingMetrics()) == ScalingDirection.DOWN
+
+    @pytest.mark.asyncio
+    async def test_rule_update_refreshes_instance_limits(self):
+        """Test updating a rule's limits is reflected in scaling decisions"""
+        scaler = AutoScaler()
+        scaler.current_instances = 2
+        
+        for rule in scaler.scaling_rules:
+            assert await scaler.update_scaling_rule(rule.name, min_instances=2)
+        
+        assert scaler._get_min_instances() == 2
+        assert scaler._make_scaling_decision(ScalingMetrics()) == ScalingDirection.STABLE
+        
+        assert await scaler.update_scaling_rule("cpu_scaling", max_instances=99)
+        assert scaler._get_max_instances() == 99
+
+    def test_ring_row_matches_scaling_metrics(self):
+        """Test voting on a history row agrees with voting on the sample"""
+        scaler = AutoScaler()
+        metrics = ScalingMetrics(cpu_usage=95.0, memory_usage=90.0, requests_per_second=150.0)
+        scaler._metrics_history.append(metrics)
+        
+        assert scaler._decide(scaler._metrics_history.row(-1)) == ScalingDirection.UP
+
+    def test_disabled_and_inverted_rules(self):
+        """Test disabled rules don't vote and cache misses count as load"""
+        scaler = AutoScaler()
+        scaler.scaling_rules = [
+            ScalingRule(
+                name="cache_scaling",
+                resource_type=ResourceType.CACHE_HIT_RATIO,
+                scale_up_threshold=50.0,
+                scale_down_threshold=10.0,
+            ),
+            ScalingRule(
+                name="cpu_scaling",
+                resource_type=ResourceType.CPU,
+                scale_up_threshold=70.0,
+                scale_down_threshold=30.0,
+                enabled=False,
+            ),
+        ]
+        
+        assert scaler._make_scaling_decision(ScalingMetrics(cache_hit_ratio=0.2)) == ScalingDirection.UP
+        assert scaler._make_scaling_decision(ScalingMetrics(cache_hit_ratio=0.6)) == ScalingDirection.STABLE
+
+    @pytest.mark.asyncio
+    async def test_cooldown_after_scaling(self):
+        """Test rules sit out votes until their cooldown passes"""
+        scaler = AutoScaler()
+        scaler._environment = {"platform": "unknown"}
+        busy = ScalingMetrics(cpu_usage=95.0, memory_usage=90.0, requests_per_second=150.0)
+        
+        await scaler._execute_scaling(ScalingDirection.UP, busy)
+        assert scaler.current_instances > 1
+        assert all(scaler._is_in_cooldown(rule) for rule in scaler.scaling_rules)
+        assert scaler._make_scaling_decision(busy) == ScalingDirection.STABLE
+        
+        for rule in scaler.scaling_rules:
+            await scaler.update_scaling_rule(rule.name, cooldown_seconds=0)
+        assert scaler._make_scaling_decision(busy) == ScalingDirection.UP
+
+    def test_metric_value_per_resource_type(self):
+        """Test each rule resource type reads the matching metric"""
+        scaler = AutoScaler()
+        metrics = ScalingMetrics(
+            cpu_usage=10.0, memory_usage=20.0, active_connections=3,
+            requests_per_second=40.0, database_connections=5, cache_hit_ratio=0.75
+        )
+        
+        assert scaler._get_metric_value(metrics, ResourceType.CPU) == 10.0
+        assert scaler._get_metric_value(metrics, ResourceType.MEMORY) == 20.0
+        assert scaler._get_metric_value(metrics, ResourceType.CONNECTIONS) == 3
+        assert scaler._get_metric_value(metrics, ResourceType.REQUESTS_PER_SECOND) == 40.0
+        assert scaler._get_metric_value(metrics, ResourceType.DATABASE_CONNECTIONS) == 5
+        assert scaler._get_metric_value(metrics, ResourceType.CACHE_HIT_RATIO) == 25.0
+        assert scaler._get_metric_value(metrics, None) == 0.0
+
+
+    def test_rps_counts_requests_in_window(self, monkeypatch):
+        """Test RPS averages recorded requests over the sliding window"""
+        import time
+        
+        now = [1000.0]
+        monkeypatch.setattr(time, "monotonic", lambda: now[0])
+        scaler = AutoScaler()
+        assert scaler._calculate_rps() == 0.0
+        
+        for _ in range(120):
+            scaler.record_request()
+        assert scaler._calculate_rps() == 120 / RPS_WINDOW_SECONDS
+        
+        now[0] += RPS_WINDOW_SECONDS / 2
+        for _ in range(60):
+            scaler.record_request()
+        assert scaler._calculate_rps() == 180 / RPS_WINDOW_SECONDS
+        
+        now[0] += RPS_WINDOW_SECONDS / 2 + 1
+        assert scaler._calculate_rps() == 60 / RPS_WINDOW_SECONDS
+
+
+class TestDeploymentEnvironment:
+    """Test deployment environment caching"""
+
+    @pytest.mark.asyncio
+    async def test_scaling_uses_cached_environment(self):
+        """Test scaling branches on the detected environment without re-probing"""
+        scaler = AutoScaler()
+        scaler._environment = {"platform": "kubernetes"}
+        
+        async def fail_detection():
+            raise AssertionError("environment re-detected")
+        
+        scaled = []
+        
+        async def scale_kubernetes(target_instances):
+            scaled.append(target_instances)
+            return True
+        
+        scaler._detect_deployment_environment = fail_detection
+        scaler._scale_kubernetes = scale_kubernetes
+        
+        assert await scaler._perform_scaling(ScalingDirection.UP, 3)
+        assert scaled == [3]
+
+    @pytest.mark.asyncio
+    async def test_cloud_probes_share_one_client(self, monkeypatch):
+        """Test all metadata endpoints are probed and the first 200 wins"""
+        import httpx
+        
+        requested = []
+        
+        def handler(request):
+            requested.append(request.url.host)
+            if request.url.host == "metadata.google.internal":
+                return httpx.Response(200)
+            raise httpx.ConnectError("unreachable", request=request)
+        
+        real_client = httpx.AsyncClient
+        monkeypatch.setattr(
+            httpx, "AsyncClient",
+            lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs)
+        )
+        
+        assert await AutoScaler()._detect_cloud_provider() == "gcp"
+        assert sorted(requested) == ["169.254.169.254", "169.254.169.254", "metadata.google.internal"]
+
+    @pytest.mark.asyncio
+    async def test_cloud_detection_is_time_capped(self, monkeypatch):
+        """Test hanging metadata endpoints don't stall detection"""
+        import time
+        import httpx
+        
+        async def handler(request):
+            await asyncio.sleep(30)
+        
+        real_client = httpx.AsyncClient
+        monkeypatch.setattr(
+            httpx, "AsyncClient",
+            lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs)
+        )
+        
+        start = time.monotonic()
+        assert await AutoScaler()._detect_cloud_provider() is None
+        assert time.monotonic() - start < 5
+
+    @pytest.mark.asyncio
+    async def test_first_successful_probe_wins(self, monkeypatch):
+        """Test a slower-than-instant 200 is returned and hanging probes are cancelled"""
+        import time
+        import httpx
+        
+        async def handler(request):
+            if request.url.host == "metadata.google.internal":
+                await asyncio.sleep(0.4)
+                return httpx.Response(200)
+            await asyncio.sleep(30)
+        
+        real_client = httpx.AsyncClient
+        monkeypatch.setattr(
+            httpx, "AsyncClient",
+            lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs)
+        )
+        
+        start = time.monotonic()
+        assert await AutoScaler()._detect_cloud_provider() == "gcp"
+        assert time.monotonic() - start < 0.8
+
+    def test_docker_detected_from_cgroup(self, monkeypatch, tmp_path):
+        """Test a containerd cgroup entry marks the process as containerized"""
+        import builtins
+        
+        cgroup = tmp_path / "cgroup"
+        cgroup.write_bytes(b"0::/system.slice/containerd.service\n")
+        
+        real_open = builtins.open
+        monkeypatch.setattr(os.path, "exists", lambda path: False)
+        monkeypatch.setattr(
+            builtins, "open",
+            lambda path, *args, **kwargs: real_open(cgroup if path == "/proc/1/cgroup" else path, *args, **kwargs)
+        )
+        
+        assert AutoScaler()._check_docker()
+        
+        cgroup.write_bytes(b"0::/init.scope\n")
+        assert not AutoScaler()._check_docker()
+
+
+class TestLifecycle:
+    """Test starting and stopping the background loops"""
+
+    @pytest.mark.asyncio
+    async def test_initialize_starts_background_loops(self):
+        """Test the background loops are running after initialize and stop on cleanup"""
+        scaler = AutoScaler()
+        collected = []
+        
+        async def detect_environment():
+            return {"platform": "unknown"}
+        
+        async def collect_metrics():
+            collected.append(True)
+            return ScalingMetrics()
+        
+        scaler._detect_deployment_environment = detect_environment
+        scaler._collect_current_metrics = collect_metrics
+        
+        assert await scaler.initialize()
+        await asyncio.sleep(0)
+        
+        assert collected
+        assert not scaler._driver_task.done()
+        
+        await scaler.cleanup()
+        assert scaler._driver_task.done()
+
+    @pytest.mark.asyncio
+    async def test_driver_loop_staggers_work(self, monkeypatch):
+        """Test one loop collects every tick and evaluates/optimizes on their intervals"""
+        scaler = AutoScaler()
+        scaler._initialized = True
+        calls = {"monitor": 0, "evaluate": 0, "optimize": 0}
+        
+        def counter(name):
+            async def step():
+                calls[name] += 1
+            return step
+        
+        scaler._monitor_metrics = counter("monitor")
+        scaler._evaluate_scaling = counter("evaluate")
+        scaler._optimize_resources = counter("optimize")
+        
+        async def sleep(delay):
+            if calls["monitor"] == 20:
+                scaler._initialized = False
+        
+        monkeypatch.setattr(asyncio, "sleep", sleep)
+        await scaler._driver_loop()
+        
+        assert calls == {"monitor": 20, "evaluate": 10, "optimize": 2}
+
+    @pytest.mark.asyncio
+    async def test_cpu_sampling_does_not_block(self, monkeypatch):
+        """Test CPU usage is sampled without psutil's blocking interval"""
+        import psutil
+        
+        intervals = []
+        
+        def cpu_percent(interval=None):
+            intervals.append(interval)
+            return 12.5
+        
+        monkeypatch.setattr(psutil, "cpu_percent", cpu_percent)
+        
+        metrics = await AutoScaler()._collect_current_metrics()
+        
+        assert metrics.cpu_usage == 12.5
+        assert intervals == [None]
+
+    @pytest.mark.asyncio
+    async def test_garbage_collection_runs_on_loop_thread(self, monkeypatch):
+        """Test forced garbage collection stays on the event loop thread"""
+        import gc
+        import threading
+        
+        threads = []
+        real_collect = gc.collect
+        
+        def collect(*args, **kwargs):
+            threads.append(threading.get_ident())
+            return real_collect(*args, **kwargs)
+        
+        monkeypatch.setattr(gc, "collect", collect)
+        scaler = AutoScaler()
+        scaler.gc_threshold_memory_mb = 0
+        
+        await scaler._perform_memory_optimization()
+        
+        assert threads == [threading.get_ident()]
+
+    @pytest.mark.asyncio
+    async def test_unchanged_metrics_are_not_republished(self, monkeypatch):
+        """Test Prometheus gauges are only written when the sample changes"""
+        from hermes.monitoring.enhanced_metrics import metrics_collector
+        
+        published = []
+        monkeypatch.setattr(
+            metrics_collector, "update_cache_metrics",
+            lambda **kwargs: published.append(kwargs["memory_usage"])
+        )
+        scaler = AutoScaler()
+        samples = iter([ScalingMetrics(memory_usage=1.0), ScalingMetrics(memory_usage=1.0), ScalingMetrics(memory_usage=2.0)])
+        
+        async def collect_metrics():
+            return next(samples)
+        
+        scaler._collect_current_metrics = collect_metrics
+        for _ in range(3):
+            await scaler._monitor_metrics()
+        
+        assert len(scaler._metrics_history) == 3
+        assert published == [1024 * 1024, 2 * 1024 * 1024]
@@ -6,6 +6,12 @@ import os
 os.environ["OPENAI_API_KEY"] = "test-key-123"
 os.environ["DEBUG"] = "true"
 
+import asyncio
+import json
+import sqlite3
+import threading
+
+import numpy as np
 import pytest
 from unittest.mock import AsyncMock, Mock, patch
 from datetime import datetime
@@ -13,6 +19,17 @@ from datetime import datetime
 from hermes.reasoning.tree_of_thought import TreeOfThoughtReasoner
 from hermes.reasoning.monte_carlo import MonteCarloValidator
 from hermes.reasoning.models import ReasoningPath, ReasoningResult, ValidationResult
+from hermes.reasoning import token_budget
+from hermes.reasoning.response_cache import ResponseCache
+from hermes.reasoning.semantic_cache import (
+    EmbeddingCache,
+    SemanticSimulationCache,
+    SQLiteEmbeddingStore,
+    _BKTree,
+    context_digest,
+    exact_key,
+    simhash64,
+)
 
 
 class TestTreeOfThoughtReasoner:
@@ -55,6 +72,113 @@ Conclusion: Test conclusion
                 assert isinstance(path, ReasoningPath)
                 assert path.query == "Test query"
 
+    @pytest.mark.asyncio
+    async def test_generate_reasoning_paths_reuses_cached_responses(self):
+        """Test repeated queries are served from the response cache"""
+        reasoner = TreeOfThoughtReasoner(openai_api_key="test-key")
+        
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "1. First step\nConclusion: Done"
+        
+        with patch.object(reasoner.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+            mock_create.return_value = mock_response
+            
+            first = await reasoner.generate_reasoning_paths(query="Test query", num_paths=2)
+            second = await reasoner.generate_reasoning_paths(query="Test query", num_paths=2)
+            
+            assert mock_create.call_count == 2
+            assert [p.conclusion for p in second] == [p.conclusion for p in first]
+            assert {p.path_id for p in first}.isdisjoint(p.path_id for p in second)
+            assert reasoner.cache_stats()["hits"] == 2
+
+    @pytest.mark.asyncio
+    async def test_reason_pipelines_generation_and_evaluation(self):
+        """Test early paths are evaluated while slower paths still generate"""
+        reasoner = TreeOfThoughtReasoner(
+            openai_api_key="test-key",
+            num_paths=4,
+            max_concurrent=4,
+            evaluation_flush_interval=0.02,
+        )
+        events = []
+        
+        def reply(content):
+            response = Mock()
+            response.choices = [Mock()]
+            response.choices[0].message.content = content
+            return response
+        
+        async def fake_completion(**kwargs):
+            prompt = kwargs["messages"][1]["content"]
+            if "PATH 1" in prompt:
+                count = prompt.count("### PATH")
+                events.append(("evaluate", count))
+                return reply(json.dumps({"scores": [0.5] * count}))
+            
+            path_index = round((kwargs["temperature"] - 0.7) * 10)
+            # Paths 0 and 1 are fast; 2 and 3 arrive much later
+            await asyncio.sleep(0.01 if path_index < 2 else 0.2)
+            events.append(("generate", path_index))
+            return reply(f"1. Step\nConclusion: Answer {path_index}")
+        
+        with patch.object(reasoner.client.chat.completions, 'create', side_effect=fake_completion):
+            result = await reasoner.reason("Test query")
+        
+        assert [p.metadata["path_index"] for p in result.paths] == [0, 1, 2, 3]
+        assert result.total_paths_generated == 4
+        # The fast paths are scored together before the slow ones finish
+        assert events.index(("evaluate", 2)) < events.index(("generate", 2))
+        assert sum(count for kind, count in events if kind == "evaluate") == 4
+
+    @pytest.mark.asyncio
+    async def test_context_truncated_once_per_request(self, monkeypatch):
+        """Test oversized context is cut to the token budget once, not per path"""
+        monkeypatch.setattr(token_budget, "_encoding_for_model", lambda model: None)
+        calls = []
+        real_truncate = token_budget.truncate_to_tokens
+        
+        def truncate(text, max_tokens, model):
+            calls.append(text)
+            return real_truncate(text, max_tokens, model)
+        
+        monkeypatch.setattr(token_budget, "truncate_to_tokens", truncate)
+        reasoner = TreeOfThoughtReasoner(openai_api_key="test-key", max_context_tokens=10)
+        
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "1. First step\nConclusion: Done"
+        
+        with patch.object(reasoner.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+            mock_create.return_value = mock_response
+            await reasoner.generate_reasoning_paths("Test query", "x" * 1000, num_paths=3)
+        
+        assert len(calls) == 1
+        assert mock_create.call_count == 3
+        for call in mock_create.call_args_list:
+            prompt = call.kwargs["messages"][-1]["content"]
+            assert f"Context: {'x' * 40}\n" in prompt
+            assert "x" * 41 not in prompt
+
+    def test_parse_reasoning_response(self):
+        """Test steps and conclusion are extracted from a reasoning reply"""
+        reasoner = TreeOfThoughtReasoner(openai_api_key="test-key")
+        
+        steps, conclusion = reasoner._parse_reasoning_response("""
+1. The contract was signed
+- Both parties performed
+• No breach occurred
+Not a step
+4. In summary: the claim fails
+on the merits
+""")
+        
+        assert steps == ["1. The contract was signed", "- Both parties performed", "• No breach occurred"]
+        assert conclusion == "the claim fails on the merits"
+        
+        steps, conclusion = reasoner._parse_reasoning_response("1. Only step")
+        assert conclusion == "1. Only step"
+
     @pytest.mark.asyncio
     async def test_evaluate_paths(self):
         """Test path evaluation"""
@@ -81,6 +205,75 @@ Conclusion: Test conclusion
             assert len(evaluated) == 1
             assert evaluated[0].evaluation_score > 0
 
+    @pytest.mark.asyncio
+    async def test_evaluate_paths_uses_single_call(self):
+        """Test all paths are scored by one batched evaluator call"""
+        reasoner = TreeOfThoughtReasoner(openai_api_key="test-key")
+        
+        paths = [
+            ReasoningPath(
+                path_id=f"path_{i}",
+                query="Test",
+                reasoning_steps=[f"Step {i}"],
+                conclusion=f"Conclusion {i}",
+                confidence_score=0.8,
+                evaluation_score=0.0,
+            )
+            for i in range(3)
+        ]
+        
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = '{"scores": [0.2, 0.9, 1.4]}'
+        
+        with patch.object(reasoner.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+            mock_create.return_value = mock_response
+            
+            evaluated = await reasoner.evaluate_paths(paths)
+            
+            assert mock_create.call_count == 1
+            assert [p.evaluation_score for p in evaluated] == [0.2, 0.9, 1.0]
+
+    @pytest.mark.asyncio
+    async def test_single_path_evaluation_stops_streaming_at_score(self):
+        """Test the fallback evaluator stops reading once a score is complete"""
+        reasoner = TreeOfThoughtReasoner(openai_api_key="test-key")
+        
+        test_path = ReasoningPath(
+            path_id="path_1",
+            query="Test",
+            reasoning_steps=["Step 1"],
+            conclusion="Conclusion",
+            confidence_score=0.8,
+            evaluation_score=0.0,
+        )
+        
+        consumed = []
+        
+        class FakeStream:
+            def __init__(self, pieces):
+                self.pieces = pieces
+                self.close = AsyncMock()
+            
+            async def __aiter__(self):
+                for piece in self.pieces:
+                    consumed.append(piece)
+                    chunk = Mock()
+                    chunk.choices = [Mock()]
+                    chunk.choices[0].delta.content = piece
+                    yield chunk
+        
+        stream = FakeStream(["0", ".", "85", "\n", "Because"])
+        with patch.object(reasoner.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+            mock_create.return_value = stream
+            
+            evaluated = await reasoner._evaluate_single_path(test_path)
+        
+        assert evaluated.evaluation_score == 0.85
+        assert consumed == ["0", ".", "85", "\n"]
+        assert mock_create.call_args.kwargs["stream"] is True
+        stream.close.assert_awaited_once()
+
     @pytest.mark.asyncio
     async def test_select_best_path(self):
         """Test best path selection"""
@@ -103,6 +296,30 @@ Conclusion: Test conclusion
         assert best.path_id == "path_2"  # Highest scores
 
 
+    @pytest.mark.asyncio
+    async def test_select_best_path_ties_and_scores(self):
+        """Test ties keep the earliest path and combined scores are recorded"""
+        reasoner = TreeOfThoughtReasoner(openai_api_key="test-key")
+        
+        paths = [
+            ReasoningPath(
+                path_id=f"path_{i}",
+                query="Test",
+                reasoning_steps=[],
+                conclusion="Conclusion",
+                confidence_score=confidence,
+                evaluation_score=evaluation,
+            )
+            for i, (evaluation, confidence) in enumerate([(0.2, 0.2), (0.9, 0.5), (0.9, 0.5)])
+        ]
+        
+        best = await reasoner.select_best_path(paths)
+        
+        assert best.path_id == "path_1"
+        assert paths[0].metadata["combined_score"] == pytest.approx(0.2)
+        assert isinstance(paths[1].metadata["combined_score"], float)
+        assert paths[1].metadata["combined_score"] == pytest.approx(0.78)
+
 class TestMonteCarloValidator:
     """Test Monte Carlo validation"""
 
@@ -135,6 +352,224 @@ class TestMonteCarloValidator:
             
             assert len(results) <= 5
 
+    @pytest.mark.asyncio
+    async def test_simulate_reasoning_reuses_cached_responses(self):
+        """Test identical (query, context) simulations skip the API when caching is enabled"""
+        validator = MonteCarloValidator(openai_api_key="test-key", response_cache_size=64)
+        
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "Consistent answer"
+        
+        with patch.object(validator.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+            mock_create.return_value = mock_response
+            
+            await validator.simulate_reasoning(query="Test query", num_simulations=5)
+            results = await validator.simulate_reasoning(query="Test query", num_simulations=5)
+            assert mock_create.call_count == 5
+            assert results == ["Consistent answer"] * 5
+            
+            await validator.simulate_reasoning(query="Test query", context="Other", num_simulations=5)
+            assert mock_create.call_count == 10
+        
+        assert validator.cache_stats()["response"]["hits"] == 5
+
+    @pytest.mark.asyncio
+    async def test_context_truncated_once_per_run(self, monkeypatch):
+        """Test every simulation shares one truncated context and the cache embeds the query alone"""
+        monkeypatch.setattr(token_budget, "_encoding_for_model", lambda model: None)
+        calls = []
+        real_truncate = token_budget.truncate_to_tokens
+        
+        def truncate(text, max_tokens, model):
+            calls.append(text)
+            return real_truncate(text, max_tokens, model)
+        
+        monkeypatch.setattr(token_budget, "truncate_to_tokens", truncate)
+        validator = MonteCarloValidator(
+            openai_api_key="test-key", embedding_model="text-embedding-3-small", max_context_tokens=10
+        )
+        embedded = []
+        
+        async def embed_texts(texts):
+            embedded.extend(texts)
+            return None
+        
+        validator._embed_texts = embed_texts
+        
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "Answer"
+        
+        with patch.object(validator.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+            mock_create.return_value = mock_response
+            await validator.simulate_reasoning("Test query", "x" * 1000, num_simulations=5)
+        
+        assert len(calls) == 1
+        assert embedded[0] == "Test query"
+        for call in mock_create.call_args_list:
+            assert "x" * 41 not in call.kwargs["messages"][-1]["content"]
+
+    @pytest.mark.asyncio
+    async def test_response_cache_is_opt_in(self):
+        """Test repeated runs sample fresh answers by default"""
+        validator = MonteCarloValidator(openai_api_key="test-key")
+        
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "Consistent answer"
+        
+        with patch.object(validator.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+            mock_create.return_value = mock_response
+            
+            await validator.simulate_reasoning(query="Test query", num_simulations=5)
+            await validator.simulate_reasoning(query="Test query", num_simulations=5)
+            assert mock_create.call_count == 10
+        
+        assert validator.response_cache is None
+        assert "response" not in validator.cache_stats()
+
+    @pytest.mark.asyncio
+    async def test_distinct_queries_sharing_context_miss_cache(self):
+        """Test a second question over the same context is not served the first one's answers"""
+        validator = MonteCarloValidator(openai_api_key="test-key", embedding_model="text-embedding-3-small")
+        context = " ".join(f"clause{i}" for i in range(300))
+        
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "Consistent answer"
+        
+        async def fake_embed(model, input):
+            # Any text containing the context is dominated by it
+            response = Mock()
+            response.data = [
+                Mock(embedding=[
+                    10.0 * (context in text),
+                    float(text.startswith("Who")),
+                    float(text.startswith("When")),
+                    1.0,
+                ])
+                for text in input
+            ]
+            return response
+        
+        with patch.object(validator.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create, \
+             patch.object(validator.client.embeddings, 'create', side_effect=fake_embed):
+            mock_create.return_value = mock_response
+            
+            await validator.simulate_reasoning("Who owes the deposit?", context, num_simulations=5)
+            await validator.simulate_reasoning("When is the deposit due?", context, num_simulations=5)
+            assert mock_create.call_count == 10
+            
+            await validator.simulate_reasoning("Who owes the deposit?", "Another contract", num_simulations=5)
+            assert mock_create.call_count == 15
+            
+            await validator.simulate_reasoning("Who owes the deposit?", context, num_simulations=5)
+            assert mock_create.call_count == 15
+        
+        assert validator.semantic_cache.hits == 1
+        assert len(validator.semantic_cache) == 3
+
+    @pytest.mark.asyncio
+    async def test_negated_answer_gets_its_own_embedding(self):
+        """Test near-duplicate answers with opposite meanings are embedded separately"""
+        validator = MonteCarloValidator(openai_api_key="test-key", embedding_model="text-embedding-3-small")
+        facts = " ".join(f"fact{i}" for i in range(95))
+        liable = f"The defendant is liable because {facts}"
+        not_liable = f"The defendant is not liable because {facts}"
+        assert (simhash64(liable) ^ simhash64(not_liable)).bit_count() <= 3
+        embedded = []
+        
+        async def fake_embed(model, input):
+            embedded.extend(input)
+            response = Mock()
+            response.data = [Mock(embedding=[0.0, 1.0] if " not " in text else [1.0, 0.0]) for text in input]
+            return response
+        
+        with patch.object(validator.client.embeddings, 'create', side_effect=fake_embed):
+            await validator._embed_texts([liable])
+            embeddings = await validator._embed_texts([liable, not_liable])
+        
+        assert embedded == [liable, not_liable]
+        assert embeddings[0] @ embeddings[1] == 0.0
+
+    @pytest.mark.asyncio
+    async def test_embedding_store_io_runs_off_event_loop(self, tmp_path):
+        """Test store reads are batched, store I/O runs in worker threads and close() closes the store"""
+        path = str(tmp_path / "embeddings.db")
+        validator = MonteCarloValidator(
+            openai_api_key="test-key",
+            embedding_model="text-embedding-3-small",
+            embedding_cache_path=path,
+        )
+        store = validator.embedding_cache.store
+        loop_thread = threading.get_ident()
+        io_threads = []
+        
+        def record(method):
+            def wrapper(*args):
+                io_threads.append(threading.get_ident())
+                return method(*args)
+            return wrapper
+        
+        store.get_many = record(store.get_many)
+        store.flush = record(store.flush)
+        
+        async def fake_embed(model, input):
+            response = Mock()
+            response.data = [Mock(embedding=[1.0, 0.0]) for _ in input]
+            return response
+        
+        with patch.object(validator.client.embeddings, 'create', side_effect=fake_embed):
+            await validator._embed_texts(["Answer: yes", "Answer: no"])
+        
+        # One batched read and one flush for both texts
+        assert len(io_threads) == 2
+        assert loop_thread not in io_threads
+        
+        await validator.close()
+        with pytest.raises(sqlite3.ProgrammingError):
+            store._conn.execute("SELECT 1")
+        assert SQLiteEmbeddingStore(path, "text-embedding-3-small").get(exact_key("Answer: yes")) is not None
+
+    @pytest.mark.asyncio
+    async def test_context_manager_closes_embedding_store(self, tmp_path):
+        """Test leaving the async context closes the embedding store"""
+        async with MonteCarloValidator(
+            openai_api_key="test-key",
+            embedding_model="text-embedding-3-small",
+            embedding_cache_path=str(tmp_path / "embeddings.db"),
+        ) as validator:
+            store = validator.embedding_cache.store
+        
+        with pytest.raises(sqlite3.ProgrammingError):
+            store._conn.execute("SELECT 1")
+
+    @pytest.mark.asyncio
+    async def test_simulate_reasoning_bounds_concurrency(self):
+        """Test no more than max_concurrent simulations are in flight"""
+        validator = MonteCarloValidator(openai_api_key="test-key", max_concurrent=3)
+        
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "Consistent answer"
+        in_flight = 0
+        peak = 0
+        
+        async def fake_completion(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return mock_response
+        
+        with patch.object(validator.client.chat.completions, 'create', side_effect=fake_completion):
+            results = await validator.simulate_reasoning(query="Test query", num_simulations=10)
+        
+        assert len(results) == 10
+        assert peak == 3
+
     def test_calculate_consistency(self):
         """Test consistency calculation"""
         validator = MonteCarloValidator(openai_api_key="test-key")
@@ -149,6 +584,25 @@ class TestMonteCarloValidator:
         consistency = validator.calculate_consistency(results)
         assert consistency < 0.2
 
+    def test_calculate_consistency_normalizes_answers(self):
+        """Test case, punctuation and whitespace differences are ignored"""
+        validator = MonteCarloValidator(openai_api_key="test-key")
+        
+        ascii_results = ["Yes, it is.", "yes it  is", "YES -- it is!"] * 4
+        assert validator.calculate_consistency(ascii_results) == pytest.approx(1.0 - 1 / 12)
+        
+        unicode_results = ["Café — oui.", "café oui", "CAFÉ, OUI"] * 4
+        assert validator.calculate_consistency(unicode_results) == pytest.approx(1.0 - 1 / 12)
+
+    def test_calculate_variance(self):
+        """Test length variance matches the sample coefficient of variation"""
+        validator = MonteCarloValidator(openai_api_key="test-key")
+        
+        assert validator.calculate_variance(["same"] * 5) == 0.0
+        assert validator.calculate_variance(["ab", "abcd"]) == pytest.approx(1.4142135 / 3)
+        assert validator.calculate_variance(["", ""]) == 0.0
+        assert validator.calculate_variance(["a", "a" * 1000]) == 1.0
+
     def test_calculate_confidence(self):
         """Test confidence calculation"""
         validator = MonteCarloValidator(openai_api_key="test-key")
@@ -180,3 +634,382 @@ class TestMonteCarloValidator:
             assert isinstance(result, ValidationResult)
             assert result.num_simulations <= 5
             assert 0.0 <= result.consistency_score <= 1.0
+
+    @pytest.mark.asyncio
+    async def test_simulate_reasoning_reuses_semantic_cache(self):
+        """Test cached simulations are reused for an equivalent query"""
+        validator = MonteCarloValidator(
+            openai_api_key="test-key",
+            embedding_model="text-embedding-3-small",
+        )
+        
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "Consistent answer"
+        
+        mock_embedding = Mock()
+        mock_embedding.data = [Mock(embedding=[1.0, 0.0, 0.0])]
+        
+        with patch.object(validator.client.chat.completions, 'create', new_callable=AsyncMock) as mock_create, \
+             patch.object(validator.client.embeddings, 'create', new_callable=AsyncMock) as mock_embed:
+            mock_create.return_value = mock_response
+            mock_embed.return_value = mock_embedding
+            
+            first = await validator.simulate_reasoning(query="Test query", num_simulations=5)
+            assert mock_create.call_count == 5
+            
+            # Fully cached pool: no new completions
+            second = await validator.simulate_reasoning(query="Test query", num_simulations=5)
+            assert mock_create.call_count == 5
+            assert second == first
+            
+            # Larger pool: only the missing simulations are run
+            third = await validator.simulate_reasoning(query="Test query", num_simulations=8)
+            assert mock_create.call_count == 8
+            assert len(third) == 8
+
+    @pytest.mark.asyncio
+    async def test_semantic_consistency_batches_and_memoizes(self):
+        """Test paraphrased answers cluster together with one batched embed call"""
+        validator = MonteCarloValidator(
+            openai_api_key="test-key",
+            embedding_model="text-embedding-3-small",
+        )
+        vectors = {
+            "Yes, it is.": [1.0, 0.0],
+            "It is, yes.": [0.98, 0.2],
+            "No.": [0.0, 1.0],
+        }
+        
+        async def fake_embed(model, input):
+            response = Mock()
+            response.data = [Mock(embedding=vectors[text]) for text in input]
+            return response
+        
+        results = ["Yes, it is.", "It is, yes.", "No."] * 4
+        with patch.object(validator.client.embeddings, 'create', side_effect=fake_embed) as mock_embed:
+            consistency = await validator.calculate_semantic_consistency(results)
+            assert consistency == pytest.approx(1.0 - 2 / 12)
+            assert mock_embed.call_count == 1
+            assert mock_embed.call_args.kwargs["input"] == ["Yes, it is.", "It is, yes.", "No."]
+            
+            # Embeddings are memoized per text
+            await validator.calculate_semantic_consistency(results)
+            assert mock_embed.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_semantic_consistency_falls_back_without_embeddings(self):
+        """Test lexical consistency is used when no embedding model is set"""
+        validator = MonteCarloValidator(openai_api_key="test-key")
+        results = ["Same answer"] * 10
+        
+        assert await validator.calculate_semantic_consistency(results) == validator.calculate_consistency(results)
+
+    @pytest.mark.asyncio
+    async def test_simulate_reasoning_stops_early_on_convergence(self):
+        """Test simulation stops once one answer cluster dominates"""
+        validator = MonteCarloValidator(
+            openai_api_key="test-key",
+            embedding_model="text-embedding-3-small",
+            max_concurrent=10,
+        )
+        
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "Consistent answer"
+        
+        async def fake_completion(**kwargs):
+            await asyncio.sleep(0.01)
+            return mock_response
+        
+        async def fake_embed(model, input):
+            response = Mock()
+            response.data = [Mock(embedding=[1.0, 0.0]) for _ in input]
+            return response
+        
+        with patch.object(validator.client.chat.completions, 'create', side_effect=fake_completion) as mock_create, \
+             patch.object(validator.client.embeddings, 'create', side_effect=fake_embed):
+            results = await validator.simulate_reasoning(query="Test query", num_simulations=100)
+            
+            assert len(results) == 10
+            # Only the first wave and the slots it freed were ever started
+            assert mock_create.call_count <= 20
+
+
+class TestEmbeddingCache:
+    """Test embedding memoization"""
+
+    def test_get_put_and_eviction(self):
+        """Test embeddings are memoized and evicted in LRU order"""
+        cache = EmbeddingCache(max_entries=2)
+        cache.put("a", np.array([1.0], dtype=np.float32))
+        cache.put("b", np.array([2.0], dtype=np.float32))
+        assert cache.get("a") is not None
+        cache.put("c", np.array([3.0], dtype=np.float32))
+        
+        assert cache.get("b") is None
+        assert cache.get("a")[0] == 1.0
+        assert len(cache) == 2
+
+
+    def test_trivial_rewrites_share_embedding(self):
+        """Test case and punctuation changes hit the same entry"""
+        cache = EmbeddingCache()
+        cache.put("Answer: yes.", np.array([1.0], dtype=np.float32))
+        
+        assert cache.get("answer yes")[0] == 1.0
+        assert cache.get("Answer: no.") is None
+
+    def test_near_duplicates_miss_by_default(self):
+        """Test only equal fingerprints hit unless max_distance is raised"""
+        text = " ".join(f"word{i}" for i in range(120))
+        cache = EmbeddingCache()
+        cache.put(text, np.array([1.0], dtype=np.float32))
+        
+        assert cache.get(text + " extra") is None
+
+    def test_near_duplicate_hit_within_hamming_distance(self):
+        """Test fingerprints a few bits apart reuse the cached embedding"""
+        text = " ".join(f"word{i}" for i in range(120))
+        distance = (simhash64(text) ^ simhash64(text + " extra")).bit_count()
+        assert 0 < distance <= 3
+        
+        cache = EmbeddingCache(max_distance=3)
+        cache.put(text, np.array([1.0], dtype=np.float32))
+        assert cache.get(text + " extra")[0] == 1.0
+        
+        exact = EmbeddingCache(max_distance=0)
+        exact.put(text, np.array([1.0], dtype=np.float32))
+        assert exact.get(text + " extra") is None
+
+    def test_word_order_changes_fingerprint(self):
+        """Test shingled fingerprints distinguish reordered words"""
+        cache = EmbeddingCache()
+        cache.put("the plaintiff owes the defendant", np.array([1.0], dtype=np.float32))
+        
+        assert cache.get("The plaintiff owes the defendant.")[0] == 1.0
+        assert cache.get("the defendant owes the plaintiff") is None
+
+    def test_exact_entries_skip_near_duplicate_lookup(self):
+        """Test exact keys only match the identical text"""
+        text = " ".join(f"word{i}" for i in range(120))
+        cache = EmbeddingCache(max_distance=3)
+        cache.put(text, np.array([1.0], dtype=np.float32), fuzzy=False)
+        
+        assert cache.get(text, fuzzy=False)[0] == 1.0
+        assert cache.get(text + " extra", fuzzy=False) is None
+        assert cache.get(text + " extra") is None
+
+    def test_bk_tree_matches_brute_force(self):
+        """Test BK-tree nearest-neighbor search against a linear scan"""
+        rng = np.random.default_rng(0)
+        keys = [int(k) for k in rng.integers(0, 2**63, size=200)]
+        tree = _BKTree()
+        for key in keys:
+            tree.add(key)
+        
+        for key in keys[:20]:
+            probe = key ^ (1 << 5) ^ (1 << 40)
+            expected = min(keys, key=lambda k: (k ^ probe).bit_count())
+            assert tree.nearest(probe, 3, lambda k: True) == expected
+            assert tree.nearest(probe, 1, lambda k: True) is None
+
+    def test_persistent_store_survives_restart(self, tmp_path):
+        """Test flushed embeddings are read back by a new cache instance"""
+        path = str(tmp_path / "embeddings.db")
+        
+        store = SQLiteEmbeddingStore(path, "text-embedding-3-small")
+        cache = EmbeddingCache(store=store)
+        cache.put("Answer: yes", np.array([0.6, 0.8], dtype=np.float32))
+        cache.flush()
+        store.close()
+        
+        reopened = EmbeddingCache(store=SQLiteEmbeddingStore(path, "text-embedding-3-small"))
+        assert reopened.get("answer yes").tolist() == pytest.approx([0.6, 0.8])
+        assert len(reopened) == 1
+        
+        other_model = EmbeddingCache(store=SQLiteEmbeddingStore(path, "other-model"))
+        assert other_model.get("answer yes") is None
+
+    @pytest.mark.asyncio
+    async def test_store_misses_are_read_in_one_batch(self, tmp_path):
+        """Test in-memory misses are fetched from the store together"""
+        path = str(tmp_path / "embeddings.db")
+        store = SQLiteEmbeddingStore(path, "text-embedding-3-small")
+        for i in range(3):
+            store.put(exact_key(f"answer {i}"), np.array([float(i)], dtype=np.float32))
+        store.close()
+        
+        reopened = SQLiteEmbeddingStore(path, "text-embedding-3-small")
+        batches = []
+        real_get_many = reopened.get_many
+        reopened.get_many = lambda keys: batches.append(keys) or real_get_many(keys)
+        cache = EmbeddingCache(store=reopened)
+        
+        texts = ["answer 0", "answer 1", "answer 2", "answer 3"]
+        embeddings = await cache.aget_many(texts, fuzzy=False)
+        
+        assert len(batches) == 1
+        assert [e[0] if e is not None else None for e in embeddings] == [0.0, 1.0, 2.0, None]
+        assert (cache.hits, cache.misses) == (3, 1)
+
+    def test_store_read_error_is_a_miss(self, tmp_path):
+        """Test SQLite read errors are logged and treated as cache misses"""
+        store = SQLiteEmbeddingStore(str(tmp_path / "embeddings.db"), "text-embedding-3-small")
+        store._conn.close()
+        
+        cache = EmbeddingCache(store=store)
+        assert cache.get("Answer: yes") is None
+        assert cache.misses == 1
+
+    def test_store_flush_failure_keeps_rows(self, tmp_path):
+        """Test a failed BEGIN skips ROLLBACK and leaves rows queued for the next flush"""
+        store = SQLiteEmbeddingStore(str(tmp_path / "embeddings.db"), "text-embedding-3-small")
+        store.put(b"h" * 16, np.array([1.0], dtype=np.float32))
+        real_conn = store._conn
+        failing_conn = Mock(in_transaction=False)
+        failing_conn.execute.side_effect = sqlite3.OperationalError("database is locked")
+        store._conn = failing_conn
+        
+        store.flush()
+        
+        assert [call.args[0] for call in failing_conn.execute.call_args_list] == ["BEGIN"]
+        store._conn = real_conn
+        store.close()
+        assert SQLiteEmbeddingStore(str(tmp_path / "embeddings.db"), "text-embedding-3-small").get(b"h" * 16)[0] == 1.0
+
+class TestSemanticSimulationCache:
+    """Test semantic simulation cache"""
+
+    def test_lookup_hit_and_miss(self):
+        """Test similar embeddings hit and dissimilar ones miss"""
+        cache = SemanticSimulationCache(similarity_threshold=0.9)
+        cache.store(np.array([1.0, 0.0], dtype=np.float32), ["a", "b"])
+        
+        near = np.array([0.99, 0.141], dtype=np.float32)
+        assert cache.lookup(near / np.linalg.norm(near)) == ["a", "b"]
+        assert cache.lookup(np.array([0.0, 1.0], dtype=np.float32)) is None
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_near_duplicate_updates_in_place(self):
+        """Test near-duplicate stores replace the existing entry"""
+        cache = SemanticSimulationCache(merge_threshold=0.95)
+        cache.store(np.array([1.0, 0.0], dtype=np.float32), ["a"])
+        cache.store(np.array([1.0, 0.0], dtype=np.float32), ["a", "b"])
+        
+        assert len(cache) == 1
+        assert cache.lookup(np.array([1.0, 0.0], dtype=np.float32)) == ["a", "b"]
+
+    def test_context_must_match_exactly(self):
+        """Test identical query embeddings over different contexts neither hit nor merge"""
+        cache = SemanticSimulationCache()
+        embedding = np.array([1.0, 0.0], dtype=np.float32)
+        cache.store(embedding, ["a"], context_digest("Lease A"))
+        cache.store(embedding, ["b"], context_digest("Lease B"))
+        
+        assert len(cache) == 2
+        assert cache.lookup(embedding, context_digest("Lease A")) == ["a"]
+        assert cache.lookup(embedding, context_digest("Lease B")) == ["b"]
+        assert cache.lookup(embedding) is None
+
+    def test_lru_eviction_and_ttl(self):
+        """Test entries are evicted when full and expire after the TTL"""
+        cache = SemanticSimulationCache(max_entries=2)
+        cache.store(np.array([1.0, 0.0, 0.0], dtype=np.float32), ["x"])
+        cache.store(np.array([0.0, 1.0, 0.0], dtype=np.float32), ["y"])
+        cache.store(np.array([0.0, 0.0, 1.0], dtype=np.float32), ["z"])
+        
+        assert len(cache) == 2
+        assert cache.lookup(np.array([1.0, 0.0, 0.0], dtype=np.float32)) is None
+        
+        cache.ttl_seconds = 0.0
+        assert cache.lookup(np.array([0.0, 0.0, 1.0], dtype=np.float32)) is None
+        assert len(cache) == 0
+
+
+class TestResponseCache:
+    """Test exact-match LLM response cache"""
+
+    def test_key_includes_model_and_index(self):
+        """Test keys differ by index, context and model"""
+        key = ResponseCache.make_key("q", None, 0, "gpt-4")
+        
+        assert key == ResponseCache.make_key("q", "", 0, "gpt-4")
+        assert key != ResponseCache.make_key("q", None, 1, "gpt-4")
+        assert key != ResponseCache.make_key("q", "ctx", 0, "gpt-4")
+        assert key != ResponseCache.make_key("q", None, 0, "gpt-4o")
+
+    def test_get_put_and_eviction(self):
+        """Test LRU eviction and hit/miss stats"""
+        cache = ResponseCache(max_entries=2)
+        keys = [ResponseCache.make_key("q", None, i, "gpt-4") for i in range(3)]
+        
+        cache.put(keys[0], "a")
+        cache.put(keys[1], "b")
+        assert cache.get(keys[0]) == "a"
+        
+        cache.put(keys[2], "c")
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[2]) == "c"
+        assert cache.stats() == {"hits": 2, "misses": 1, "size": 2, "max_entries": 2}
+
+
+class TestTokenBudget:
+    """Test prompt context truncation"""
+
+    def test_short_text_is_untouched(self):
+        """Test text that fits is returned as-is without tokenizing"""
+        assert token_budget.truncate_to_tokens("short", 10, "gpt-4") == "short"
+
+    def test_truncates_with_tokenizer(self, monkeypatch):
+        """Test the model tokenizer defines the budget when available"""
+        encoding = Mock()
+        encoding.encode.side_effect = lambda text: text.split()
+        encoding.decode.side_effect = lambda tokens: " ".join(tokens)
+        monkeypatch.setattr(token_budget, "_encoding_for_model", lambda model: encoding)
+        
+        text = " ".join(f"word{i}" for i in range(20))
+        
+        assert token_budget.truncate_to_tokens(text, 5, "gpt-4") == "word0 word1 word2 word3 word4"
+        assert token_budget.truncate_to_tokens(text, 20, "gpt-4") == text
+
+    @pytest.mark.asyncio
+    async def test_encodes_bounded_prefix_off_event_loop(self, monkeypatch):
+        """Test only a budget-sized prefix is encoded, in a worker thread"""
+        encoded = []
+        encoding = Mock()
+        encoding.encode.side_effect = lambda text: encoded.append((text, threading.get_ident())) or text.split()
+        encoding.decode.side_effect = lambda tokens: " ".join(tokens)
+        monkeypatch.setattr(token_budget, "_encoding_for_model", lambda model: encoding)
+        
+        text = " ".join(f"word{i}" for i in range(100_000))
+        truncated = await token_budget.atruncate_to_tokens(text, 5, "gpt-4")
+        
+        assert truncated == "word0 word1 word2 word3 word4"
+        assert len(encoded[0][0]) == 5 * token_budget.MAX_CHARS_PER_TOKEN
+        assert encoded[0][1] != threading.get_ident()
+
+    def test_fallback_encoding_failure_is_handled(self, monkeypatch):
+        """Test a failing cl100k_base load disables the tokenizer instead of raising"""
+        fake_tiktoken = Mock()
+        fake_tiktoken.encoding_for_model.side_effect = KeyError("unknown-model")
+        fake_tiktoken.get_encoding.side_effect = OSError("download failed")
+        monkeypatch.setattr(token_budget, "tiktoken", fake_tiktoken, raising=False)
+        monkeypatch.setattr(token_budget, "TIKTOKEN_AVAILABLE", True)
+        token_budget._encoding_for_model.cache_clear()
+        
+        try:
+            assert token_budget._encoding_for_model("unknown-model") is None
+            assert token_budget.truncate_to_tokens("x" * 100, 10, "unknown-model") == "x" * 40
+        finally:
+            token_budget._encoding_for_model.cache_clear()
+
+    def test_falls_back_to_character_estimate(self, monkeypatch):
+        """Test a character budget is used when no tokenizer is available"""
+        monkeypatch.setattr(token_budget, "_encoding_for_model", lambda model: None)
+        
+        text = "x" * 100
+        truncated = token_budget.truncate_to_tokens(text, 10, "gpt-4")
+        
+        assert truncated == "x" * 10 * token_budget.APPROX_CHARS_PER_TOKEN
@@ -10,7 +10,7 @@ import pytest
 import asyncio
 from unittest.mock import AsyncMock, Mock
 
-from hermes.resilience.circuit_breaker import CircuitBreaker, CircuitBreakerState
+from hermes.resilience.circuit_breaker import CircuitBreaker, CircuitBreakerState, CircuitOpenError
 from hermes.resilience.retry import RetryPolicy, retry_async, exponential_backoff
 
 
@@ -43,6 +43,20 @@ class TestCircuitBreaker:
         assert cb.state == CircuitBreakerState.CLOSED
         assert cb.failure_count == 0
 
+    @pytest.mark.asyncio
+    async def test_closed_calls_skip_lock(self):
+        """Test calls through a CLOSED circuit do not wait on the state lock"""
+        cb = CircuitBreaker(name="test")
+        
+        async def success_func():
+            return "success"
+        
+        async with cb._lock:
+            result = await asyncio.wait_for(cb.call(success_func), timeout=1.0)
+        
+        assert result == "success"
+        assert cb.state == CircuitBreakerState.CLOSED
+
     @pytest.mark.asyncio
     async def test_circuit_opens_on_failures(self):
         """Test circuit opens after threshold failures"""
@@ -62,6 +76,23 @@ class TestCircuitBreaker:
         assert cb.state == CircuitBreakerState.OPEN
         assert cb.failure_count == 3
 
+    @pytest.mark.asyncio
+    async def test_open_circuit_raises_circuit_open_error(self):
+        """Test an OPEN circuit rejects calls with CircuitOpenError"""
+        cb = CircuitBreaker(name="test", failure_threshold=1)
+        
+        async def failing_func():
+            raise ValueError("Test failure")
+        
+        with pytest.raises(ValueError):
+            await cb.call(failing_func)
+        
+        with pytest.raises(CircuitOpenError) as exc_info:
+            await cb.call(failing_func)
+        
+        assert exc_info.value.breaker_name == "test"
+        assert isinstance(exc_info.value, RuntimeError)
+
     @pytest.mark.asyncio
     async def test_fallback_function(self):
         """Test fallback function when circuit is open"""
@@ -84,6 +115,21 @@ class TestCircuitBreaker:
         result = await cb.call(failing_func, fallback=fallback_func)
         assert result == "fallback result"
 
+    @pytest.mark.asyncio
+    async def test_sync_and_builtin_fallbacks(self):
+        """Test non-coroutine fallbacks are called directly"""
+        cb = CircuitBreaker(name="test", failure_threshold=1)
+        
+        async def failing_func(*args):
+            raise Exception("Test failure")
+        
+        def sync_fallback(*args):
+            return "sync fallback"
+        
+        assert await cb.call(failing_func, fallback=sync_fallback) == "sync fallback"
+        assert await cb.call(failing_func, fallback=sync_fallback) == "sync fallback"
+        assert await cb.call(failing_func, [1, 2], fallback=len) == 2
+
     @pytest.mark.asyncio
     async def test_circuit_recovery(self):
         """Test circuit recovery from OPEN to CLOSED"""
@@ -155,6 +201,20 @@ class TestRetryLogic:
         assert policy.calculate_delay(1) == 2.0
         assert policy.calculate_delay(2) == 4.0
 
+    def test_calculate_delay_caps_and_extends_table(self):
+        """Test delays are capped and attempts past max_attempts still work"""
+        policy = RetryPolicy(
+            max_attempts=3,
+            initial_delay=1.0,
+            max_delay=3.0,
+            jitter=False
+        )
+        
+        assert [policy.calculate_delay(i) for i in range(5)] == [1.0, 2.0, 3.0, 3.0, 3.0]
+        
+        jittered = RetryPolicy(initial_delay=1.0, jitter=True)
+        assert 2.0 <= jittered.calculate_delay(2) <= 6.0
+
     def test_should_retry(self):
         """Test retry decision logic"""
         policy = RetryPolicy(max_attempts=3)
@@ -163,6 +223,15 @@ class TestRetryLogic:
         assert policy.should_retry(Exception("test"), 2) is True
         assert policy.should_retry(Exception("test"), 3) is False
 
+    def test_should_retry_with_exception_list(self):
+        """Test retriable exceptions given as a list are matched"""
+        policy = RetryPolicy(max_attempts=3, retriable_exceptions=[ConnectionError, TimeoutError])
+        
+        assert policy.retriable_exceptions == (ConnectionError, TimeoutError)
+        assert policy.should_retry(ConnectionError("test"), 0) is True
+        assert policy.should_retry(TimeoutError("test"), 0) is True
+        assert policy.should_retry(ValueError("test"), 0) is False
+
     @pytest.mark.asyncio
     async def test_retry_decorator_success(self):
         """Test retry decorator with successful call"""
@@ -213,6 +282,59 @@ class TestRetryLogic:
         
         assert call_count == 3
 
+    @pytest.mark.asyncio
+    async def test_retry_decorator_sleeps_only_between_attempts(self, monkeypatch):
+        """Test there is no backoff after the final failed attempt"""
+        sleeps = []
+        
+        async def fake_sleep(delay):
+            sleeps.append(delay)
+        
+        monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+        policy = RetryPolicy(max_attempts=3, initial_delay=1.0, jitter=False)
+        
+        @retry_async(policy=policy)
+        async def test_func():
+            raise ValueError("Persistent failure")
+        
+        with pytest.raises(ValueError):
+            await test_func()
+        
+        assert sleeps == [1.0, 2.0]
+
+    @pytest.mark.asyncio
+    async def test_retry_decorator_non_retriable_exception(self):
+        """Test exceptions outside retriable_exceptions are raised at once"""
+        call_count = 0
+        policy = RetryPolicy(max_attempts=3, retriable_exceptions=(ConnectionError,))
+        
+        @retry_async(policy=policy)
+        async def test_func():
+            nonlocal call_count
+            call_count += 1
+            raise ValueError("Not retriable")
+        
+        with pytest.raises(ValueError):
+            await test_func()
+        
+        assert call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_retry_decorator_does_not_retry_open_circuit(self):
+        """Test CircuitOpenError is raised immediately without backoff"""
+        call_count = 0
+        
+        @retry_async(max_attempts=3, initial_delay=10.0)
+        async def test_func():
+            nonlocal call_count
+            call_count += 1
+            raise CircuitOpenError("test")
+        
+        with pytest.raises(CircuitOpenError):
+            await asyncio.wait_for(test_func(), timeout=1.0)
+        
+        assert call_count == 1
+
     def test_exponential_backoff(self):
         """Test exponential backoff calculation"""
         delay = exponential_backoff(0, base_delay=1.0, jitter=False)